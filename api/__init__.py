@@ -14,6 +14,8 @@ from api.user import router as user
 from api.foods import router as foods
 from api.workout import router as workouts
 from api.tracking import router as tracking
+from api.metrics import router as metrics
+from api.export import router as export
 
 # Register routes with their own sub-prefixes
 api_router.include_router(auth_router, tags=["Authentication"])
@@ -25,4 +27,6 @@ api_router.include_router(plans, tags=["Plans"])
 api_router.include_router(user, tags=["User"])
 api_router.include_router(foods, tags=["Foods"])
 api_router.include_router(workouts, tags=["Workouts"])
-api_router.include_router(tracking, tags=["Tracking"])
\ No newline at end of file
+api_router.include_router(tracking, tags=["Tracking"])
+api_router.include_router(metrics, tags=["Metrics"])
+api_router.include_router(export, tags=["Export"])
\ No newline at end of file
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Request, Depends
-from sqlalchemy.orm import Session
-from db.session import get_db
-from db.models.food import FoodLog, FoodItem
-from db.models.workout import WorkoutLog, Workout
+import asyncio
+import hashlib
+import json
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, cast, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import get_async_db, AsyncSessionLocal
+from core.config import settings
+from core.pubsub import pubsub, user_channel
+from core.query_stats import query_budget
+from core.etag import conditional_get
+from db.models.daily_totals import DailyUserTotal
+from db.models.food import FoodItem, FoodLog
+from db.models.workout import Workout, WorkoutLog
+from services.daily_totals import local_today, local_day_bounds, user_timezone, Granularity, bucket_of, bucket_start, bucket_interval
+from api.food_logs import food_log_response
+from api.workout_logs import workout_log_response
 from sqlalchemy.sql import func
-from datetime import datetime, timedelta
-from pytz import timezone
+from datetime import date, timedelta
 
 router = APIRouter(
     prefix="/v1/dashboard",
@@ -13,125 +25,279 @@ router = APIRouter(
 )
 
 @router.get("/summary")
-def get_dashboard_summary(
+@query_budget(3)
+@conditional_get
+async def get_dashboard_summary(
     request: Request,
     days: int = 7,
-    db: Session = Depends(get_db)
+    start_date: date | None = Query(None, description="Range start (YYYY-MM-DD), defaults to `days` before end_date"),
+    end_date: date | None = Query(None, description="Range end (YYYY-MM-DD), defaults to today"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     current_user = request.state.user
-    since_date = datetime.utcnow() - timedelta(days=days)
-
-    # ---- Calories Consumed ----
-    food_logs = (
-        db.query(
-            func.sum(
-                (FoodLog.quantity / FoodItem.reference_amount) * FoodItem.calories
-            ).label("total_calories"),
-            func.sum(
-                (FoodLog.quantity / FoodItem.reference_amount) * FoodItem.protein
-            ).label("total_protein"),
-            func.sum(
-                (FoodLog.quantity / FoodItem.reference_amount) * FoodItem.carbs
-            ).label("total_carbs"),
-            func.sum(
-                (FoodLog.quantity / FoodItem.reference_amount) * FoodItem.fats
-            ).label("total_fats"),
-        )
-        .join(FoodItem, FoodLog.food_id == FoodItem.id)
-        .filter(FoodLog.user_id == current_user.id, FoodLog.logged_at >= since_date)
-        .first()
-    )
+    end_date = end_date or local_today(user_timezone(current_user))
+    start_date = start_date or end_date - timedelta(days=days - 1)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
 
-    # ---- Calories Burned ----
-    workout_logs = (
-        db.query(
-            func.sum(
-                (WorkoutLog.duration / Workout.reference_duration) * Workout.calories_burned
-            ).label("total_burned")
+    # ---- Calories Consumed / Burned in one round trip ----
+    totals = (
+        select(
+            func.coalesce(func.sum(DailyUserTotal.calories_consumed), 0).label("consumed"),
+            func.coalesce(func.sum(DailyUserTotal.calories_burned), 0).label("burned"),
+            func.coalesce(func.sum(DailyUserTotal.protein), 0).label("protein"),
+            func.coalesce(func.sum(DailyUserTotal.carbs), 0).label("carbs"),
+            func.coalesce(func.sum(DailyUserTotal.fats), 0).label("fats"),
+        )
+        .where(
+            DailyUserTotal.user_id == current_user.id,
+            DailyUserTotal.local_date.between(start_date, end_date)
         )
-        .join(Workout, WorkoutLog.workout_id == Workout.id)
-        .filter(WorkoutLog.user_id == current_user.id, WorkoutLog.logged_at >= since_date)
-        .first()
+        .cte("totals")
     )
-
-    consumed = float(food_logs.total_calories or 0)
-    burned = float(workout_logs.total_burned or 0)
+    query = select(totals, (totals.c.consumed - totals.c.burned).label("net"))
+    row = (await db.execute(query)).one()
 
     return {
-        "days": days,
+        "days": (end_date - start_date).days + 1,
+        "range_start": start_date,
+        "range_end": end_date,
         "calories": {
-            "consumed": consumed,
-            "burned": burned,
-            "net": consumed - burned
+            "consumed": float(row.consumed),
+            "burned": float(row.burned),
+            "net": float(row.net)
         },
         "macros": {
-            "protein": float(food_logs.total_protein or 0),
-            "carbs": float(food_logs.total_carbs or 0),
-            "fats": float(food_logs.total_fats or 0),
+            "protein": float(row.protein),
+            "carbs": float(row.carbs),
+            "fats": float(row.fats),
         }
     }
 
 @router.get("/trends")
-def get_dashboard_trends(
+@query_budget(3)
+@conditional_get
+async def get_dashboard_trends(
     request: Request,
     days: int = 7,
-    db: Session = Depends(get_db)
+    granularity: Granularity = "day",
+    db: AsyncSession = Depends(get_async_db)
 ):
     current_user = request.state.user
-    user_tz = timezone("Asia/Kolkata")  # IST
-    
-    # Get today in user's timezone
-    today_local = datetime.now(user_tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    today = local_today(user_timezone(current_user))
+    since_date = today - timedelta(days=days - 1)
 
-    since_date = today_local - timedelta(days=days - 1)
+    # Daily rollups folded into day/week/month buckets
+    bucket = bucket_of(DailyUserTotal.local_date, granularity)
+    totals = (
+        select(
+            bucket.label("bucket"),
+            func.sum(DailyUserTotal.calories_consumed).label("consumed"),
+            func.sum(DailyUserTotal.calories_burned).label("burned")
+        )
+        .where(
+            DailyUserTotal.user_id == current_user.id,
+            DailyUserTotal.local_date.between(since_date, today)
+        )
+        .group_by(bucket)
+        .subquery()
+    )
 
-    trends = []
+    # One row per bucket in the range, empty buckets filled with zeros
+    series = select(
+        cast(
+            func.generate_series(
+                bucket_start(since_date, granularity),
+                bucket_start(today, granularity),
+                bucket_interval(granularity)
+            ),
+            Date
+        ).label("day")
+    ).subquery()
+    consumed = func.coalesce(totals.c.consumed, 0)
+    burned = func.coalesce(totals.c.burned, 0)
 
-    for i in range(days):
-        day_start = since_date + timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
+    query = (
+        select(
+            series.c.day,
+            consumed.label("consumed"),
+            burned.label("burned"),
+            (consumed - burned).label("net")
+        )
+        .select_from(series)
+        .outerjoin(totals, totals.c.bucket == series.c.day)
+        .order_by(series.c.day)
+    )
+    rows = (await db.execute(query)).all()
 
-        # ---- Calories Consumed ----
-        food_logs = (
-            db.query(
-                func.sum(
-                    (FoodLog.quantity / FoodItem.reference_amount) * FoodItem.calories
-                ).label("calories")
-            )
-            .select_from(FoodLog)  
-            .join(FoodItem, FoodLog.food_id == FoodItem.id)
-            .filter(
+    trends = [
+        {
+            "date": row.day.isoformat(),
+            "consumed": float(row.consumed),
+            "burned": float(row.burned),
+            "net": float(row.net)
+        }
+        for row in rows
+    ]
+
+    return {
+        "days": days,
+        "granularity": granularity,
+        "trends": trends
+    }
+
+def _section(etag: str, known: set, build):
+    """A home-screen section; its data is only built when the client doesn't already have `etag`."""
+    if etag in known:
+        return {"etag": etag, "unchanged": True}
+    return {"etag": etag, "unchanged": False, "data": build()}
+
+def _section_etag(*parts) -> str:
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+@router.get("/today")
+@query_budget(5)
+@conditional_get
+async def get_dashboard_today(
+    request: Request,
+    known: str | None = Query(None, description="Comma-separated section etags the client already holds"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Everything the home screen needs for the user's current day in one round trip."""
+    current_user = request.state.user
+    tz_name = user_timezone(current_user)
+    today = local_today(tz_name)
+    known_etags = {etag.strip() for etag in (known or "").split(",") if etag.strip()}
+
+    totals = await db.get(DailyUserTotal, (current_user.id, today))
+    consumed = float(totals.calories_consumed) if totals else 0.0
+    burned = float(totals.calories_burned) if totals else 0.0
+    protein = float(totals.protein) if totals else 0.0
+    carbs = float(totals.carbs) if totals else 0.0
+    fats = float(totals.fats) if totals else 0.0
+    food_count = totals.food_count if totals else 0
+    workout_count = totals.workout_count if totals else 0
+    water_ml = totals.water_ml if totals else 0
+    steps = totals.steps if totals else 0
+
+    # Logs are append-only, so each section's etag follows from the rollup row
+    food_etag = _section_etag("food_logs", tz_name, today, food_count, consumed)
+    workouts_etag = _section_etag("workouts", tz_name, today, workout_count, burned)
+
+    # ---- Logs, only for sections the client doesn't have ----
+    day_start, day_end = local_day_bounds(today, tz_name)
+    food_logs, workout_logs = [], []
+    if food_count and food_etag not in known_etags:
+        food_query = (
+            select(FoodLog, FoodItem.name)
+            .join(FoodItem, FoodItem.id == FoodLog.food_id)
+            .where(
                 FoodLog.user_id == current_user.id,
                 FoodLog.logged_at >= day_start,
                 FoodLog.logged_at < day_end
             )
-            .first()
+            .order_by(FoodLog.logged_at.desc(), FoodLog.id.desc())
         )
-
-        # ---- Calories Burned (using estimated_calories) ----
-        workout_logs = (
-            db.query(
-                func.sum(WorkoutLog.estimated_calories).label("burned")
-            )
-            .filter(
+        food_logs = (await db.execute(food_query)).all()
+    if workout_count and workouts_etag not in known_etags:
+        workout_query = (
+            select(WorkoutLog, Workout)
+            .join(Workout, Workout.id == WorkoutLog.workout_id)
+            .where(
                 WorkoutLog.user_id == current_user.id,
                 WorkoutLog.logged_at >= day_start,
                 WorkoutLog.logged_at < day_end
             )
-            .first()
+            .order_by(WorkoutLog.logged_at.desc(), WorkoutLog.id.desc())
         )
+        workout_logs = (await db.execute(workout_query)).all()
 
-        consumed = float(food_logs.calories or 0)
-        burned = float(workout_logs.burned or 0)
+    return {
+        "date": today.isoformat(),
+        "sections": {
+            "totals": _section(
+                _section_etag("totals", tz_name, today, consumed, burned, protein, carbs, fats),
+                known_etags,
+                lambda: {
+                    "calories": {"consumed": consumed, "burned": burned, "net": consumed - burned},
+                    "macros": {"protein": protein, "carbs": carbs, "fats": fats},
+                }
+            ),
+            "water": _section(
+                _section_etag("water", today, water_ml),
+                known_etags,
+                lambda: {"amount": water_ml}
+            ),
+            "steps": _section(
+                _section_etag("steps", today, steps),
+                known_etags,
+                lambda: {"steps": steps}
+            ),
+            "food_logs": _section(
+                food_etag,
+                known_etags,
+                lambda: [food_log_response(log, food_name) for log, food_name in food_logs]
+            ),
+            "workouts": _section(
+                workouts_etag,
+                known_etags,
+                lambda: [workout_log_response(log, workout) for log, workout in workout_logs]
+            ),
+        }
+    }
 
-        trends.append({
-            "date": day_start.date().isoformat(),
-            "consumed": consumed,
-            "burned": burned,
-            "net": consumed - burned
-        })
+async def _current_totals(user_id: int, tz_name: str) -> dict:
+    today = local_today(tz_name)
+    # Short-lived session per push, so an open stream never pins a pooled connection
+    async with AsyncSessionLocal() as db:
+        totals = await db.get(DailyUserTotal, (user_id, today))
 
+    consumed = float(totals.calories_consumed) if totals else 0.0
+    burned = float(totals.calories_burned) if totals else 0.0
     return {
-        "days": days,
-        "trends": trends
-    }
\ No newline at end of file
+        "date": today.isoformat(),
+        "calories": {"consumed": consumed, "burned": burned, "net": consumed - burned},
+        "macros": {
+            "protein": float(totals.protein) if totals else 0.0,
+            "carbs": float(totals.carbs) if totals else 0.0,
+            "fats": float(totals.fats) if totals else 0.0,
+        },
+        "water": totals.water_ml if totals else 0,
+        "steps": totals.steps if totals else 0,
+    }
+
+@router.get("/stream")
+async def stream_dashboard(request: Request):
+    """Server-Sent Events: today's totals on connect and again after every log write."""
+    current_user = request.state.user
+    user_id = current_user.id
+    tz_name = user_timezone(current_user)
+
+    # Release the middleware's session now rather than when the stream ends
+    await request.state.async_db.close()
+
+    async def events():
+        async with pubsub.subscribe(user_channel(user_id)) as queue:
+            while True:
+                totals = await _current_totals(user_id, tz_name)
+                yield f"event: totals\ndata: {json.dumps(totals)}\n\n"
+
+                # Wait for the next change, keeping idle proxies from closing the stream
+                while True:
+                    try:
+                        await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                        break
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        yield ": heartbeat\n\n"
+
+                # Coalesce a burst of writes into one push
+                while not queue.empty():
+                    queue.get_nowait()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from core.config import settings
+from db.session import AsyncSessionLocal
+from db.models.food import FoodItem, FoodLog
+from db.models.workout import Workout, WorkoutLog
+from db.models.tracking import WaterLog, StepLog
+
+router = APIRouter(
+    prefix="/v1/export",
+    tags=["Export"]
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _export_query(kind: str, user_id: int):
+    if kind == "food_logs":
+        return (
+            select(
+                FoodLog.id,
+                FoodLog.logged_at,
+                FoodLog.food_id,
+                FoodItem.name.label("food_name"),
+                FoodLog.quantity,
+                FoodLog.unit,
+                FoodLog.calories,
+                FoodLog.protein,
+                FoodLog.carbs,
+                FoodLog.fats,
+            )
+            .join(FoodItem, FoodItem.id == FoodLog.food_id)
+            .where(FoodLog.user_id == user_id)
+            .order_by(FoodLog.logged_at, FoodLog.id)
+        )
+    if kind == "workout_logs":
+        return (
+            select(
+                WorkoutLog.id,
+                WorkoutLog.logged_at,
+                WorkoutLog.workout_id,
+                Workout.name.label("workout_name"),
+                Workout.unit,
+                WorkoutLog.sets,
+                WorkoutLog.reps_per_set,
+                WorkoutLog.total_reps,
+                WorkoutLog.duration_minutes,
+                WorkoutLog.estimated_calories,
+            )
+            .join(Workout, Workout.id == WorkoutLog.workout_id)
+            .where(WorkoutLog.user_id == user_id)
+            .order_by(WorkoutLog.logged_at, WorkoutLog.id)
+        )
+    if kind == "water":
+        return select(WaterLog.date, WaterLog.amount).where(WaterLog.user_id == user_id).order_by(WaterLog.date)
+    return select(StepLog.date, StepLog.steps).where(StepLog.user_id == user_id).order_by(StepLog.date)
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+async def _stream_export(query, fmt: str):
+    # The request's session is closed before the body streams, so the export owns its own
+    async with AsyncSessionLocal() as db:
+        # Server-side cursor: only one batch of rows is in memory at a time
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        async for rows in result.partitions():
+            buffer = io.StringIO()
+            if fmt == "csv":
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+                    for row in rows
+                )
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+@router.get("/{kind}")
+async def export_logs(
+    request: Request,
+    kind: Literal["food_logs", "workout_logs", "water", "steps"],
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+):
+    user = request.state.user
+    query = _export_query(kind, user.id)
+
+    return StreamingResponse(
+        _stream_export(query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    )
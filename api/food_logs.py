@@ -1,152 +1,215 @@
 from fastapi import APIRouter, Request, HTTPException, Query, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
-from db.session import get_db
+from db.session import get_async_db
+from core.query_stats import query_budget
+from core.etag import conditional_get
+from core.pubsub import notify_user_updated
+from core.pagination import encode_cursor, decode_cursor
+from core.config import settings
 from db.models.food import FoodItem, FoodLog
-from schemas.food_log import FoodLogCreate, FoodLogResponse, FoodSummaryResponse, DailyFoodSummary
-from datetime import datetime, timedelta
+from services.nutrient_engine import scale_batch
+from services.daily_totals import record_food_logs, local_today, user_timezone, Granularity, bucket_of
+from db.models.daily_totals import DailyUserTotal
+from schemas.food_log import FoodLogCreate, FoodLogBatchCreate, FoodLogResponse, FoodLogPage, FoodSummaryResponse, DailyFoodSummary
+from datetime import date, datetime, timedelta
 
 router = APIRouter(
     prefix="/v1/food-logs",
     tags=["Food Logs"]
 )
 
+def food_log_response(log, food_name: str):
+    return FoodLogResponse(
+        id=log.id,
+        food_id=log.food_id,
+        food_name=food_name,
+        quantity=float(log.quantity),
+        unit=log.unit,
+        logged_at=log.logged_at,
+        calories=float(log.calories or 0),
+        protein=float(log.protein or 0),
+        carbs=float(log.carbs or 0),
+        fats=float(log.fats or 0),
+        vitamins=log.vitamins or {}
+    )
+
 @router.post("/", response_model=FoodLogResponse)
-def create_food_log(request: Request, body: FoodLogCreate):
+@query_budget(6)
+async def create_food_log(request: Request, body: FoodLogCreate, db: AsyncSession = Depends(get_async_db)):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    db: Session = next(get_db())
-
-    food_item = db.query(FoodItem).filter(FoodItem.id == body.food_id).first()
+    food_item = await db.get(FoodItem, body.food_id)
     if not food_item:
         raise HTTPException(status_code=404, detail="Food item not found")
 
-    # Nutrient scaling
-    if body.unit == food_item.reference_unit:
-        scale_factor = float(body.quantity) / float(food_item.reference_amount)
-    else:
-        if not food_item.unit_conversions or body.unit not in food_item.unit_conversions:
-            raise HTTPException(status_code=400, detail="Invalid unit for this food item")
-        converted_qty = float(body.quantity) * float(food_item.unit_conversions[body.unit])
-        scale_factor = converted_qty / float(food_item.reference_amount)
+    # Nutrient scaling, snapshotted on the log so later catalog edits don't rewrite history
+    scaled = scale_batch([food_item], [body.quantity], [body.unit])
+    if scaled.invalid:
+        raise HTTPException(status_code=400, detail=scaled.invalid[0])
 
     food_log = FoodLog(
         user_id=user.id,
         food_id=food_item.id,
         quantity=body.quantity,
-        unit=body.unit
+        unit=body.unit,
+        **scaled.row(0)
     )
     db.add(food_log)
-    db.commit()
-    db.refresh(food_log)
+    await db.flush()
+    await record_food_logs(db, user, [food_log])
+    await db.commit()
+    await db.refresh(food_log)
+    await notify_user_updated(user.id)
 
-    return FoodLogResponse(
-        id=food_log.id,
-        food_id=food_item.id,
-        food_name=food_item.name,
-        quantity=float(body.quantity),
-        unit=body.unit,
-        logged_at=food_log.logged_at,
-        calories=float(food_item.calories) * scale_factor,
-        protein=float(food_item.protein) * scale_factor,
-        carbs=float(food_item.carbs) * scale_factor,
-        fats=float(food_item.fats) * scale_factor,
-        vitamins={k: v * scale_factor for k, v in (food_item.vitamins or {}).items()}
+    return food_log_response(food_log, food_item.name)
+
+
+@router.post("/batch", response_model=list[FoodLogResponse])
+@query_budget(5)
+async def create_food_logs_batch(request: Request, body: FoodLogBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    user = request.state.user
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    # Resolve every referenced food in one IN query
+    food_ids = {item.food_id for item in body.items}
+    foods = {
+        f.id: f
+        for f in (await db.scalars(select(FoodItem).where(FoodItem.id.in_(food_ids)))).all()
+    }
+
+    errors = [
+        {"index": index, "food_id": item.food_id, "error": "Food item not found"}
+        for index, item in enumerate(body.items)
+        if item.food_id not in foods
+    ]
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    scaled = scale_batch(
+        [foods[item.food_id] for item in body.items],
+        [item.quantity for item in body.items],
+        [item.unit for item in body.items]
     )
+    errors = [
+        {"index": index, "food_id": body.items[index].food_id, "error": reason}
+        for index, reason in sorted(scaled.invalid.items())
+    ]
+
+    # All or nothing: reject the whole meal if any entry is invalid
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    rows = [
+        {
+            "user_id": user.id,
+            "food_id": item.food_id,
+            "quantity": item.quantity,
+            "unit": item.unit,
+            **scaled.row(index)
+        }
+        for index, item in enumerate(body.items)
+    ]
+    inserted = (
+        await db.execute(
+            insert(FoodLog).returning(FoodLog, sort_by_parameter_order=True),
+            rows
+        )
+    ).scalars().all()
+    await record_food_logs(db, user, inserted)
+    await db.commit()
+    await notify_user_updated(user.id)
 
+    return [food_log_response(log, foods[log.food_id].name) for log in inserted]
 
-@router.get("/", response_model=list[FoodLogResponse])
-def list_food_logs(
+
+@router.get("/", response_model=FoodLogPage)
+@query_budget(2)
+async def list_food_logs(
     request: Request,
-    date: str = Query(None, description="Filter logs for a specific date (YYYY-MM-DD)")
+    start_date: date | None = Query(None, description="Only logs on or after this date (YYYY-MM-DD)"),
+    end_date: date | None = Query(None, description="Only logs on or before this date (YYYY-MM-DD)"),
+    limit: int = Query(settings.LOG_PAGE_SIZE, ge=1, le=settings.LOG_PAGE_SIZE_MAX),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    db: Session = next(get_db())
-
     query = (
-        db.query(FoodLog, FoodItem)
+        select(FoodLog, FoodItem.name)
         .join(FoodItem, FoodItem.id == FoodLog.food_id)
-        .filter(FoodLog.user_id == user.id)
+        .where(FoodLog.user_id == user.id)
     )
 
-    # ✅ If date filter provided, restrict logs to that day
-    if date:
+    if start_date:
+        query = query.where(FoodLog.logged_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.where(FoodLog.logged_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    # Keyset pagination: resume strictly after the last (logged_at, id) of the previous page
+    if cursor:
         try:
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
+            cursor_logged_at, cursor_id = decode_cursor(cursor)
         except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-        day_start = datetime.combine(target_date, datetime.min.time())
-        day_end = day_start + timedelta(days=1)
-
-        query = query.filter(
-            FoodLog.logged_at >= day_start,
-            FoodLog.logged_at < day_end
-        )
-    
-    logs = query.order_by(FoodLog.logged_at.desc()).all()
-
-    results = []
-    for log, food in logs:
-        if log.unit == food.reference_unit:
-            scale_factor = float(log.quantity) / float(food.reference_amount)
-        else:
-            converted_qty = float(log.quantity) * float(food.unit_conversions.get(log.unit, 0))
-            scale_factor = converted_qty / float(food.reference_amount) if food.reference_amount else 0
-
-        results.append(
-            FoodLogResponse(
-                id=log.id,
-                food_id=food.id,
-                food_name=food.name,
-                quantity=float(log.quantity),
-                unit=log.unit,
-                logged_at=log.logged_at,
-                calories=float(food.calories) * scale_factor,
-                protein=float(food.protein) * scale_factor,
-                carbs=float(food.carbs) * scale_factor,
-                fats=float(food.fats) * scale_factor,
-                vitamins={k: v * scale_factor for k, v in (food.vitamins or {}).items()}
-            )
-        )
-
-    return results
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(FoodLog.logged_at, FoodLog.id) < tuple_(cursor_logged_at, cursor_id))
+
+    query = query.order_by(FoodLog.logged_at.desc(), FoodLog.id.desc()).limit(limit + 1)
+    logs = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        last_log = logs[-1][0]
+        next_cursor = encode_cursor(last_log.logged_at, last_log.id)
+
+    # Nutrients were snapshotted at write time, nothing to recompute
+    return FoodLogPage(
+        items=[food_log_response(log, food_name) for log, food_name in logs],
+        next_cursor=next_cursor
+    )
 
 @router.get("/summary", response_model=FoodSummaryResponse)
-def get_food_summary(
+@query_budget(3)
+@conditional_get
+async def get_food_summary(
     request: Request,
     days: int = 7,
-    db: Session = Depends(get_db)
+    granularity: Granularity = "day",
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    today = datetime.utcnow().date()
+    today = local_today(user_timezone(user))
     since_date = today - timedelta(days=days - 1)
 
-    daily_logs = (
-        db.query(
-            func.date(FoodLog.logged_at).label("date"),
-            func.sum(FoodItem.calories * (FoodLog.quantity / FoodItem.reference_amount)).label("calories"),
-            func.sum(FoodItem.protein * (FoodLog.quantity / FoodItem.reference_amount)).label("protein"),
-            func.sum(FoodItem.carbs * (FoodLog.quantity / FoodItem.reference_amount)).label("carbs"),
-            func.sum(FoodItem.fats * (FoodLog.quantity / FoodItem.reference_amount)).label("fats"),
+    # Daily rollups folded into day/week/month buckets that had food logged
+    bucket = bucket_of(DailyUserTotal.local_date, granularity)
+    query = (
+        select(
+            bucket.label("date"),
+            func.sum(DailyUserTotal.calories_consumed).label("calories"),
+            func.sum(DailyUserTotal.protein).label("protein"),
+            func.sum(DailyUserTotal.carbs).label("carbs"),
+            func.sum(DailyUserTotal.fats).label("fats"),
         )
-        .join(FoodItem, FoodItem.id == FoodLog.food_id)
-        .filter(
-            FoodLog.user_id == user.id,
-            FoodLog.logged_at >= since_date
+        .where(
+            DailyUserTotal.user_id == user.id,
+            DailyUserTotal.local_date.between(since_date, today),
+            DailyUserTotal.food_count > 0
         )
-        .group_by(func.date(FoodLog.logged_at))
-        .order_by(func.date(FoodLog.logged_at).desc())
-        .all()
+        .group_by(bucket)
+        .order_by(bucket.desc())
     )
+    daily_logs = (await db.execute(query)).all()
 
     daily_summary = [
         DailyFoodSummary(
@@ -161,6 +224,7 @@ def get_food_summary(
 
     return FoodSummaryResponse(
         days=days,
+        granularity=granularity,
         range_start=since_date,
         range_end=today,
         total_calories=sum(d.calories for d in daily_summary),
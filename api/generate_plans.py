@@ -1,13 +1,15 @@
-import json
-import uuid
-from fastapi import APIRouter, Depends, Request, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, Request, HTTPException
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from db.session import get_db, SessionLocal
-from services.meal_plan_ai import generate_meal_plan
+from db.session import get_async_db, get_db
 from services.health_plan_ai import generate_complete_health_plan
+from services.job_worker import enqueue_job
+from services.food_candidates import select_candidate_foods
+from services.plan_generation import WEEK_DAYS, food_list_for_prompt, gather_days, plan_to_json
 from db.models.food import FoodItem
+from db.models.job import PlanJob
 from db.models.plan import Plan, PlanItem
-from schemas.plan import GeneratedPlanSchema
 from utils import get_day_name
 
 router = APIRouter(
@@ -15,161 +17,59 @@ router = APIRouter(
     tags=["Generate AI Plan"]
 )
 
-TASKS = {}
-
-def _generate_plan_task(task_id: str, user_id: int, days: int, user_profile: dict):
-    db = SessionLocal()
-    try:
-        TASKS[task_id] = {"status": "processing"}
-        
-        foods = db.query(FoodItem).all()
-        food_list = [
-            {
-                "id": f.id,
-                "name": f.name,
-                "calories": float(f.calories),
-                "protein": float(f.protein),
-                "carbs": float(f.carbs),
-                "fats": float(f.fats),
-                "reference_amount": float(f.reference_amount),
-                "reference_unit": f.reference_unit
-            }
-            for f in foods
-        ]
-
-        raw_plan = generate_meal_plan(user_profile, food_list, days)
-
-        if isinstance(raw_plan, GeneratedPlanSchema):
-            plan_data = raw_plan
-        else:
-            plan_data = GeneratedPlanSchema.model_validate(raw_plan)
-            
-        day_name = get_day_name(days)
-        existing_plan = (
-            db.query(Plan)
-            .filter(
-                Plan.user_id == user_id,
-                Plan.name == f"{day_name} AI Meal Plan"
-            )
-            .first()
-        )
-
-        if existing_plan:
-            db.query(PlanItem).filter(PlanItem.plan_id == existing_plan.id).delete()
-            existing_plan.description = "Updated by AI"
-            plan_record = existing_plan
-        else:
-            plan_record = Plan(
-                user_id=user_id,
-                name=f"{day_name} AI Meal Plan",
-                description="Generated by AI"
-            )
-            db.add(plan_record)
-            db.commit()
-            db.refresh(plan_record)
-
-        for meal in plan_data.meals:
-            for item in meal.items:
-                db.add(PlanItem(
-                    plan_id=plan_record.id,
-                    food_id=item.food_id,
-                    quantity=item.quantity,
-                    unit=item.unit,
-                    meal_name=meal.meal,
-                    day=plan_data.day
-                ))
-        db.commit()
-
-        plan_dict = plan_data.model_dump()
-        plan_dict = json.loads(json.dumps(plan_dict, default=float))
-
-        TASKS[task_id] = {
-            "status": "completed",
-            "plan_id": plan_record.id,
-            "plan": plan_dict
-        }
-
-    except Exception as e:
-        TASKS[task_id] = {"status": "failed", "error": str(e)}
-    finally:
-        db.close()
-
 @router.post("/")
-def auto_generate_plan(request: Request, background_tasks: BackgroundTasks, days: int = 1):
+def auto_generate_plan(request: Request, days: int = 1, week: bool = False, db: Session = Depends(get_db)):
     current_user = request.state.user
-    
+
     user_profile = {
         "dietary_prefs": current_user.dietary_prefs,
         "goals": current_user.goals,
-        "bmi": current_user.bmi
+        "bmi": float(current_user.bmi) if current_user.bmi is not None else None,
+        "allergies": current_user.allergies
     }
-    
-    task_id = str(uuid.uuid4())
-    TASKS[task_id] = {"status": "pending"}
-    
-    background_tasks.add_task(_generate_plan_task, task_id, current_user.id, days, user_profile)
-    
+
+    # Picked up by `python -m services.job_worker`
+    if week:
+        job = enqueue_job(db, current_user.id, "meal_plan_week", {"user_profile": user_profile})
+    else:
+        job = enqueue_job(db, current_user.id, "meal_plan", {"days": days, "user_profile": user_profile})
+
     return {
         "message": "AI meal plan generation started",
-        "task_id": task_id
+        "task_id": job.id
     }
 
 @router.get("/status/{task_id}")
-def get_task_status(task_id: str):
-    task = TASKS.get(task_id)
-    if not task:
+def get_task_status(request: Request, task_id: str, db: Session = Depends(get_db)):
+    job = db.get(PlanJob, task_id)
+    if not job or job.user_id != request.state.user.id:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
-
-@router.post("/complete")
-async def auto_generate_complete_plan(request: Request, day: int | None = None, days: int | None = None, db: Session = Depends(get_db)):
-    target_day = day if day is not None else (days if days is not None else 1)
-    current_user = request.state.user
-
-    foods = db.query(FoodItem).all()
-    food_list = [
-        {
-            "id": f.id,
-            "name": f.name,
-            "calories": float(f.calories),
-            "protein": float(f.protein),
-            "carbs": float(f.carbs),
-            "fats": float(f.fats),
-            "reference_amount": float(f.reference_amount),
-            "reference_unit": f.reference_unit
-        }
-        for f in foods
-    ]
 
-    user_profile = {
-        "dietary_prefs": current_user.dietary_prefs,
-        "goals": current_user.goals,
-        "bmi": current_user.bmi,
-        "allergies": current_user.allergies,
-        "budget": current_user.budget
-    }
-
-    try:
-        plan = await generate_complete_health_plan(user_profile, food_list, target_day)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Graph execution failed: {e}")
-
-    plan_dict = plan.model_dump()
-    plan_dict = json.loads(json.dumps(plan_dict, default=float))
+    task = {"status": job.status, "attempts": job.attempts}
+    if job.status == "completed":
+        task.update(job.result or {})
+    else:
+        if job.result:
+            # Days of a week plan finished so far
+            task["progress"] = job.result
+        if job.error:
+            task["error"] = job.error
+    return task
 
-    # Store complete plan in database
-    day_name = get_day_name(target_day)
-    existing_plan = (
-        db.query(Plan)
-        .filter(
-            Plan.user_id == current_user.id,
+async def _save_health_plan(db: AsyncSession, user_id: int, day: int, plan) -> Plan:
+    """Create or replace the user's AI health plan for `day`; the caller commits."""
+    plan_dict = plan_to_json(plan)
+    day_name = get_day_name(day)
+    existing_plan = await db.scalar(
+        select(Plan)
+        .where(
+            Plan.user_id == user_id,
             Plan.name == f"{day_name} AI Health Plan"
         )
-        .first()
     )
 
     if existing_plan:
-        db.query(PlanItem).filter(PlanItem.plan_id == existing_plan.id).delete()
+        await db.execute(delete(PlanItem).where(PlanItem.plan_id == existing_plan.id))
         existing_plan.description = "Complete Health Plan Updated by AI"
         existing_plan.workout_plan = plan_dict.get("workout_plan")
         existing_plan.avoidance_list = plan_dict.get("avoidance_list")
@@ -177,7 +77,7 @@ async def auto_generate_complete_plan(request: Request, day: int | None = None,
         plan_record = existing_plan
     else:
         plan_record = Plan(
-            user_id=current_user.id,
+            user_id=user_id,
             name=f"{day_name} AI Health Plan",
             description="Complete Health Plan Generated by AI",
             workout_plan=plan_dict.get("workout_plan"),
@@ -185,24 +85,77 @@ async def auto_generate_complete_plan(request: Request, day: int | None = None,
             budget_tips=plan_dict.get("budget_tips")
         )
         db.add(plan_record)
-        db.commit()
-        db.refresh(plan_record)
-
-    for meal in plan.meal_plan:
-        for item in meal.items:
-            db.add(PlanItem(
-                plan_id=plan_record.id,
-                food_id=item.food_id,
-                quantity=item.quantity,
-                unit=item.unit,
-                meal_name=meal.meal,
-                day=plan.day
-            ))
-    db.commit()
+        await db.flush()
+
+    db.add_all(
+        PlanItem(
+            plan_id=plan_record.id,
+            food_id=item.food_id,
+            quantity=item.quantity,
+            unit=item.unit,
+            meal_name=meal.meal,
+            day=plan.day
+        )
+        for meal in plan.meal_plan
+        for item in meal.items
+    )
+    return plan_record
+
+@router.post("/complete")
+async def auto_generate_complete_plan(
+    request: Request,
+    day: int | None = None,
+    days: int | None = None,
+    week: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    target_day = day if day is not None else (days if days is not None else 1)
+    current_user = request.state.user
+
+    user_profile = {
+        "dietary_prefs": current_user.dietary_prefs,
+        "goals": current_user.goals,
+        "bmi": current_user.bmi,
+        "allergies": current_user.allergies,
+        "budget": current_user.budget
+    }
+
+    # Planner and critic both see only this shortlist, not the whole catalog
+    food_list = select_candidate_foods(
+        food_list_for_prompt((await db.scalars(select(FoodItem))).all()),
+        user_profile
+    )
+    # Give the connection back to the pool while the LLM graph runs
+    await db.rollback()
+
+    # Week mode runs all seven days concurrently, so it takes about as long as one
+    target_days = list(WEEK_DAYS) if week else [target_day]
+    try:
+        plans = await gather_days(
+            lambda plan_day: generate_complete_health_plan(user_profile, food_list, plan_day),
+            target_days
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Graph execution failed: {e}")
+
+    # Store every day's plan in one transaction
+    records = [
+        await _save_health_plan(db, current_user.id, plan_day, plan)
+        for plan_day, plan in zip(target_days, plans)
+    ]
+    await db.commit()
+
+    if week:
+        return {
+            "message": "Complete weekly health plan generated successfully via LangGraph Agents",
+            "plans": [
+                {"day": get_day_name(plan_day), "plan_id": record.id, "plan": plan_to_json(plan)}
+                for plan_day, record, plan in zip(target_days, records, plans)
+            ]
+        }
 
     return {
         "message": "Complete health plan generated successfully via LangGraph Agents",
-        "plan_id": plan_record.id,
-        "plan": plan_dict
+        "plan_id": records[0].id,
+        "plan": plan_to_json(plans[0])
     }
-
@@ -0,0 +1,45 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException
+from core.config import settings
+from db.session import engine, async_engine
+from db.pool import pool_status
+from core.query_stats import route_query_registry
+from auth.user_cache import user_cache
+from auth.jwt_handler import token_cache
+from core.etag import response_cache
+from services.prompt_format import prompt_token_registry
+
+def require_metrics_token(x_metrics_token: str | None = Header(None)):
+    """Operator-only access: the X-Metrics-Token header must match settings.METRICS_TOKEN."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+router = APIRouter(
+    prefix="/v1/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(require_metrics_token)]
+)
+
+@router.get("/db")
+def get_db_metrics():
+    return {
+        "pools": {
+            "sync": pool_status(engine),
+            "async": pool_status(async_engine.sync_engine),
+        },
+        "caches": {
+            "users": user_cache.stats(),
+            "tokens": token_cache.stats(),
+            "responses": response_cache.stats(),
+        },
+    }
+
+@router.get("/sql")
+def get_sql_metrics():
+    return {"routes": route_query_registry.snapshot()}
+
+@router.get("/prompts")
+def get_prompt_metrics():
+    return {"nodes": prompt_token_registry.snapshot()}
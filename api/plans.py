@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from db.session import get_db
 from db.models.plan import Plan, PlanItem
 from db.models.food import FoodItem
+from services.nutrient_engine import scale_batch
 
 router = APIRouter(
     prefix="/v1/plans",
@@ -39,8 +40,17 @@ def get_plan(plan_id: int, request: Request, db: Session = Depends(get_db)):
         .all()
     )
 
+    # Scale every item to its planned quantity in one pass; items that can't be scaled come back as None
+    scaled = scale_batch(
+        [food for _, food in plan_items],
+        [item.quantity for item, _ in plan_items],
+        [item.unit for item, _ in plan_items]
+    )
+    invalid = set(scaled.invalid)
+
     days_dict = {}
-    for item, food in plan_items:
+    for index, (item, food) in enumerate(plan_items):
+        nutrients = None if index in invalid else scaled.row(index)
         if item.day not in days_dict:
             days_dict[item.day] = {}
         if item.meal_name not in days_dict[item.day]:
@@ -50,10 +60,10 @@ def get_plan(plan_id: int, request: Request, db: Session = Depends(get_db)):
             "food_name": food.name,
             "quantity": float(item.quantity),
             "unit": item.unit,
-            "calories": float(food.calories),
-            "protein": float(food.protein),
-            "carbs": float(food.carbs),
-            "fats": float(food.fats),
+            "calories": nutrients["calories"] if nutrients else None,
+            "protein": nutrients["protein"] if nutrients else None,
+            "carbs": nutrients["carbs"] if nutrients else None,
+            "fats": nutrients["fats"] if nutrients else None,
         })
 
     days_list = [
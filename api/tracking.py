@@ -1,73 +1,87 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
-from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.tracking import WaterOut, WaterCreate, StepCreate, StepOut
-from db.session import get_db
+from db.session import get_async_db
+from core.query_stats import query_budget
+from core.etag import conditional_get
+from core.pubsub import notify_user_updated
 from db.models.tracking import WaterLog, StepLog
+from services.daily_totals import record_water, record_steps, local_today, user_timezone
 
 router = APIRouter(prefix="/v1/tracking", tags=["Tracking"])
 
 # --- Water ---
 @router.get("/water/today", response_model=WaterOut)
-def get_today_water(request: Request, db: Session = Depends(get_db)):
+@query_budget(5)
+@conditional_get
+async def get_today_water(request: Request, db: AsyncSession = Depends(get_async_db)):
     current_user = request.state.user
-    log = (
-        db.query(WaterLog)
-        .filter(WaterLog.user_id == current_user.id, WaterLog.date == date.today())
-        .first()
+    today = local_today(user_timezone(current_user))
+    log = await db.scalar(
+        select(WaterLog)
+        .where(WaterLog.user_id == current_user.id, WaterLog.date == today)
     )
     if not log:
-        log = WaterLog(user_id=current_user.id, date=date.today(), amount=0)
+        log = WaterLog(user_id=current_user.id, date=today, amount=0)
         db.add(log)
-        db.commit()
-        db.refresh(log)
-    return log
+        await db.commit()
+        await db.refresh(log)
+    return WaterOut.model_validate(log)
 
 @router.post("/water", response_model=WaterOut)
-def add_water(request: Request, payload: WaterCreate, db: Session = Depends(get_db)):
+@query_budget(6)
+async def add_water(request: Request, payload: WaterCreate, db: AsyncSession = Depends(get_async_db)):
     current_user = request.state.user
-    log = (
-        db.query(WaterLog)
-        .filter(WaterLog.user_id == current_user.id, WaterLog.date == date.today())
-        .first()
+    today = local_today(user_timezone(current_user))
+    log = await db.scalar(
+        select(WaterLog)
+        .where(WaterLog.user_id == current_user.id, WaterLog.date == today)
     )
     if not log:
-        log = WaterLog(user_id=current_user.id, date=date.today(), amount=0)
+        log = WaterLog(user_id=current_user.id, date=today, amount=0)
         db.add(log)
     log.amount += payload.amount
-    db.commit()
-    db.refresh(log)
+    await record_water(db, current_user.id, log.date, payload.amount)
+    await db.commit()
+    await db.refresh(log)
+    await notify_user_updated(current_user.id)
     return log
 
 
 # --- Steps ---
 @router.get("/steps/today", response_model=StepOut)
-def get_today_steps(request: Request, db: Session = Depends(get_db)):
+@query_budget(5)
+@conditional_get
+async def get_today_steps(request: Request, db: AsyncSession = Depends(get_async_db)):
     current_user = request.state.user
-    log = (
-        db.query(StepLog)
-        .filter(StepLog.user_id == current_user.id, StepLog.date == date.today())
-        .first()
+    today = local_today(user_timezone(current_user))
+    log = await db.scalar(
+        select(StepLog)
+        .where(StepLog.user_id == current_user.id, StepLog.date == today)
     )
     if not log:
-        log = StepLog(user_id=current_user.id, date=date.today(), steps=0)
+        log = StepLog(user_id=current_user.id, date=today, steps=0)
         db.add(log)
-        db.commit()
-        db.refresh(log)
-    return log
+        await db.commit()
+        await db.refresh(log)
+    return StepOut.model_validate(log)
 
 @router.post("/steps", response_model=StepOut)
-def add_steps(request: Request, payload: StepCreate, db: Session = Depends(get_db)):
+@query_budget(6)
+async def add_steps(request: Request, payload: StepCreate, db: AsyncSession = Depends(get_async_db)):
     current_user = request.state.user
-    log = (
-        db.query(StepLog)
-        .filter(StepLog.user_id == current_user.id, StepLog.date == date.today())
-        .first()
+    today = local_today(user_timezone(current_user))
+    log = await db.scalar(
+        select(StepLog)
+        .where(StepLog.user_id == current_user.id, StepLog.date == today)
     )
     if not log:
-        log = StepLog(user_id=current_user.id, date=date.today(), steps=0)
+        log = StepLog(user_id=current_user.id, date=today, steps=0)
         db.add(log)
     log.steps += payload.steps
-    db.commit()
-    db.refresh(log)
+    await record_steps(db, current_user.id, log.date, payload.steps)
+    await db.commit()
+    await db.refresh(log)
+    await notify_user_updated(current_user.id)
     return log
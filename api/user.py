@@ -3,6 +3,8 @@ from db.models.user import User
 from schemas.user import UserResponse, UserGoalsResponse, UserGoalsUpdate, UserUpdateMe
 from sqlalchemy.orm import Session
 from db.session import get_db
+from auth.user_cache import invalidate_user
+from services.daily_totals import rebuild as rebuild_daily_totals
 
 router = APIRouter(prefix="/v1/user", tags=["User"])
 
@@ -17,13 +19,10 @@ def update_me(
     body: UserUpdateMe,
     db: Session = Depends(get_db),
 ):
-    user = request.state.user
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    db_user = db.query(User).filter(User.id == user.id).first()
+    # Attached to this session by get_db
+    db_user: User = request.state.user
     if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=401, detail="Unauthorized")
 
     if body.name is not None:
         db_user.name = body.name
@@ -40,12 +39,22 @@ def update_me(
     if body.budget is not None:
         db_user.budget = body.budget
 
+    timezone_changed = body.timezone is not None and body.timezone != db_user.timezone
+    if timezone_changed:
+        db_user.timezone = body.timezone
+
     # Auto-calculate BMI if height and weight are available
     if db_user.height_cm and db_user.weight_kg:
         height_m = float(db_user.height_cm) / 100
         if height_m > 0:
             db_user.bmi = round(float(db_user.weight_kg) / (height_m**2), 2)
 
+    # Day boundaries moved, so re-bucket this user's rollups in the same transaction
+    if timezone_changed:
+        db.flush()
+        rebuild_daily_totals(db.connection(), user_id=db_user.id)
+
+    invalidate_user(db, db_user.id)
     db.commit()
     db.refresh(db_user)
 
@@ -57,18 +66,16 @@ def update_goals(
     body: UserGoalsUpdate,
     db: Session = Depends(get_db),
 ):
-    user = request.state.user
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    db_user = db.query(User).filter(User.id == user.id).first()
+    # Attached to this session by get_db
+    db_user: User = request.state.user
     if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=401, detail="Unauthorized")
 
     # update goals + target
     db_user.goals = body.goals
     db_user.target_weight = body.target_weight
 
+    invalidate_user(db, db_user.id)
     db.commit()
     db.refresh(db_user)
 
@@ -83,13 +90,10 @@ def update_goals(
 
 @router.get("/goals", response_model=UserGoalsResponse)
 def get_goals(request: Request, db: Session = Depends(get_db)):
-    user = request.state.user
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    db_user = db.query(User).filter(User.id == user.id).first()
+    # Attached to this session by get_db
+    db_user: User = request.state.user
     if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=401, detail="Unauthorized")
 
     return UserGoalsResponse(
         id=db_user.id,
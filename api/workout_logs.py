@@ -1,25 +1,47 @@
 from fastapi import APIRouter, Request, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
-from db.session import get_db
+from db.session import get_async_db
+from core.query_stats import query_budget
+from core.etag import conditional_get
+from core.pubsub import notify_user_updated
+from core.pagination import encode_cursor, decode_cursor
+from core.config import settings
 from db.models.workout import Workout, WorkoutLog
-from schemas.workout_logs import WorkoutLogCreate, WorkoutLogResponse, WorkoutSummaryResponse, DailyWorkoutSummary
-from datetime import datetime, timedelta
+from db.models.daily_totals import DailyUserTotal
+from services.daily_totals import record_workout_log, local_today, user_timezone, Granularity, bucket_of
+from schemas.workout_logs import WorkoutLogCreate, WorkoutLogResponse, WorkoutLogPage, WorkoutSummaryResponse, DailyWorkoutSummary
+from datetime import date, datetime, timedelta
 
 router = APIRouter(
     prefix="/v1/workout-logs",
     tags=["Workout Logs"]
 )
 
+def workout_log_response(log, workout):
+    return WorkoutLogResponse(
+        id=log.id,
+        workout_id=workout.id,
+        workout_name=workout.name,
+        unit=workout.unit,
+        sets=log.sets,
+        reps_per_set=log.reps_per_set,
+        total_reps=log.total_reps,
+        duration_minutes=log.duration_minutes,
+        estimated_calories=float(log.estimated_calories),
+        muscle_groups=workout.muscle_groups,
+        logged_at=log.logged_at,
+    )
+
 @router.post("/", response_model=WorkoutLogResponse)
-def log_workout(request: Request, body: WorkoutLogCreate):
+@query_budget(6)
+async def log_workout(request: Request, body: WorkoutLogCreate, db: AsyncSession = Depends(get_async_db)):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    db: Session = next(get_db())
-
-    workout = db.query(Workout).filter(Workout.id == body.workout_id).first()
+    workout = await db.get(Workout, body.workout_id)
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
 
@@ -52,8 +74,11 @@ def log_workout(request: Request, body: WorkoutLogCreate):
         estimated_calories=estimated_calories,
     )
     db.add(workout_log)
-    db.commit()
-    db.refresh(workout_log)
+    await db.flush()
+    await record_workout_log(db, user, workout_log)
+    await db.commit()
+    await db.refresh(workout_log)
+    await notify_user_updated(user.id)
 
     return WorkoutLogResponse(
         id=workout_log.id,
@@ -69,87 +94,86 @@ def log_workout(request: Request, body: WorkoutLogCreate):
         logged_at=workout_log.logged_at,
     )
 
-@router.get("/", response_model=list[WorkoutLogResponse])
-def list_workouts(
+@router.get("/", response_model=WorkoutLogPage)
+@query_budget(2)
+async def list_workouts(
     request: Request,
-    date: str = Query(None, description="Filter logs for a specific date (YYYY-MM-DD)"),
+    start_date: date | None = Query(None, description="Only logs on or after this date (YYYY-MM-DD)"),
+    end_date: date | None = Query(None, description="Only logs on or before this date (YYYY-MM-DD)"),
+    limit: int = Query(settings.LOG_PAGE_SIZE, ge=1, le=settings.LOG_PAGE_SIZE_MAX),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    db: Session = next(get_db())
-    
     query = (
-        db.query(WorkoutLog, Workout)
+        select(WorkoutLog, Workout)
         .join(Workout, Workout.id == WorkoutLog.workout_id)
-        .filter(WorkoutLog.user_id == user.id)
+        .where(WorkoutLog.user_id == user.id)
     )
 
-    # ✅ If date filter provided, restrict logs to that day
-    if date:
+    if start_date:
+        query = query.where(WorkoutLog.logged_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.where(WorkoutLog.logged_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    # Keyset pagination: resume strictly after the last (logged_at, id) of the previous page
+    if cursor:
         try:
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
+            cursor_logged_at, cursor_id = decode_cursor(cursor)
         except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(WorkoutLog.logged_at, WorkoutLog.id) < tuple_(cursor_logged_at, cursor_id))
 
-        day_start = datetime.combine(target_date, datetime.min.time())
-        day_end = day_start + timedelta(days=1)
+    query = query.order_by(WorkoutLog.logged_at.desc(), WorkoutLog.id.desc()).limit(limit + 1)
+    logs = (await db.execute(query)).all()
 
-        query = query.filter(
-            WorkoutLog.logged_at >= day_start,
-            WorkoutLog.logged_at < day_end
-        )
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        last_log = logs[-1][0]
+        next_cursor = encode_cursor(last_log.logged_at, last_log.id)
 
-    logs = query.order_by(WorkoutLog.logged_at.desc()).all()
-
-    results = []
-    for log, workout in logs:
-        results.append(
-            WorkoutLogResponse(
-                id=log.id,
-                workout_id=workout.id,
-                workout_name=workout.name,
-                unit=workout.unit,
-                sets=log.sets,
-                reps_per_set=log.reps_per_set,
-                total_reps=log.total_reps,
-                duration_minutes=log.duration_minutes,
-                estimated_calories=float(log.estimated_calories),
-                muscle_groups=workout.muscle_groups,
-                logged_at=log.logged_at,
-            )
-        )
-
-    return results
+    return WorkoutLogPage(
+        items=[workout_log_response(log, workout) for log, workout in logs],
+        next_cursor=next_cursor
+    )
 
 @router.get("/summary", response_model=WorkoutSummaryResponse)
-def get_workout_summary(
+@query_budget(3)
+@conditional_get
+async def get_workout_summary(
     request: Request,
     days: int = 7,
-    db: Session = Depends(get_db)
+    granularity: Granularity = "day",
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    today = datetime.utcnow().date()
+    today = local_today(user_timezone(user))
     since_date = today - timedelta(days=days - 1)
 
-    daily_logs = (
-        db.query(
-            func.date(WorkoutLog.logged_at).label("date"),
-            func.count(WorkoutLog.id).label("workouts"),
-            func.sum(WorkoutLog.estimated_calories).label("calories")
+    # Daily rollups folded into day/week/month buckets that had a workout logged
+    bucket = bucket_of(DailyUserTotal.local_date, granularity)
+    query = (
+        select(
+            bucket.label("date"),
+            func.sum(DailyUserTotal.workout_count).label("workouts"),
+            func.sum(DailyUserTotal.calories_burned).label("calories")
         )
-        .filter(
-            WorkoutLog.user_id == user.id,
-            WorkoutLog.logged_at >= since_date
+        .where(
+            DailyUserTotal.user_id == user.id,
+            DailyUserTotal.local_date.between(since_date, today),
+            DailyUserTotal.workout_count > 0
         )
-        .group_by(func.date(WorkoutLog.logged_at))
-        .order_by(func.date(WorkoutLog.logged_at).desc())
-        .all()
+        .group_by(bucket)
+        .order_by(bucket.desc())
     )
+    daily_logs = (await db.execute(query)).all()
 
     daily_summary = [
         DailyWorkoutSummary(
@@ -162,6 +186,7 @@ def get_workout_summary(
 
     return WorkoutSummaryResponse(
         days=days,
+        granularity=granularity,
         range_start=since_date,
         range_end=today,
         total_workouts=sum(d.workouts for d in daily_summary),
@@ -1,7 +1,16 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
+import time
 import jwt
+from core.cache import TTLCache
 from core.config import settings
 
+# Payloads of tokens that already passed signature verification, keyed by token digest
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -17,4 +26,19 @@ def decode_access_token(token: str):
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         return payload
     except jwt.PyJWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_access_token(token: str) -> dict:
+    """
+    Verify a token, skipping the HMAC check for tokens verified before.
+    Raises the same jwt exceptions as jwt.decode on failure.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    exp = payload.get("exp")
+    token_cache.set(key, payload, ttl=exp - time.time() if exp is not None else None)
+    return payload
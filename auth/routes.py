@@ -14,6 +14,7 @@ from auth.jwt_handler import create_access_token
 from datetime import timedelta
 from core.config import settings
 from auth.jwt_handler import decode_access_token
+from auth.user_cache import invalidate_user
 
 router = APIRouter(
     prefix="/v1/auth",
@@ -87,6 +88,7 @@ def complete_onboarding(
     current_user.goals = data.goals
     current_user.is_onboarded = True
 
+    invalidate_user(db, current_user.id)
     db.commit()
     db.refresh(current_user)
 
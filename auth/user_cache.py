@@ -0,0 +1,39 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from core.cache import TTLCache
+from core.config import settings
+from core.pubsub import pubsub
+from db.models.user import User
+
+USER_CACHE_CHANNEL = "user_cache"
+
+# Detached snapshots of users loaded by the auth middleware, keyed by user id
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+def cache_user(user: User):
+    """Cache a detached copy so the session-bound instance is never shared across requests."""
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    user_cache.set(user.id, snapshot)
+
+def invalidate_user(db: Session, user_id: int):
+    """
+    Drop the user from every worker's cache once `db` commits. Call it before
+    the commit, the broadcast rides the same transaction as the write.
+    """
+    user_id = int(user_id)
+    pubsub.publish_on_commit(db, USER_CACHE_CHANNEL, {"type": "invalidate", "user_id": user_id})
+    # The next request may land on this worker before the broadcast comes back
+    event.listen(db, "after_commit", lambda session: user_cache.invalidate(user_id), once=True)
+
+def _on_invalidation(message: dict):
+    if message.get("type") == "invalidate":
+        user_cache.invalidate(message["user_id"])
+    else:
+        # Re-delivered after a lost LISTEN connection, any invalidation may have been missed
+        user_cache.clear()
+
+pubsub.add_handler(USER_CACHE_CHANNEL, _on_invalidation)
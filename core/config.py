@@ -2,10 +2,83 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with the asyncpg driver
+    ASYNC_DATABASE_URL: str | None = None
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     GEMINI_API_KEY: str
+    DEBUG: bool = False
+
+    # Fail requests that exceed the query budget declared with @query_budget
+    SQL_QUERY_BUDGET_STRICT: bool = False
+
+    # Connection pool, applied to both the sync and async engines
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Operator token for /api/v1/metrics (X-Metrics-Token header); unset disables the endpoints
+    METRICS_TOKEN: str | None = None
+
+    # Timezone that decides which local day a log belongs to
+    DEFAULT_TIMEZONE: str = "Asia/Kolkata"
+
+    # Keyset pagination of log listings
+    LOG_PAGE_SIZE: int = 50
+    LOG_PAGE_SIZE_MAX: int = 200
+
+    # Rows fetched per server-side cursor batch when streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Monthly partitions of food_logs / workout_logs
+    LOG_PARTITION_MONTHS_AHEAD: int = 3
+    LOG_PARTITION_MIN_MONTHS_AHEAD: int = 1  # maintenance logs an error below this coverage
+    LOG_RETENTION_MONTHS: int = 0  # 0 keeps everything
+    LOG_RETENTION_ACTION: str = "detach"  # "detach" keeps the old table for archival, "drop" deletes it
+
+    # Opt-in detection of connections that are never returned to the pool
+    DB_LEAK_DETECTION: bool = False
+    DB_LEAK_THRESHOLD_SECONDS: float = 30.0
+
+    # Authenticated user cache (used by the auth middleware)
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Verified JWT cache, entries never outlive the token's own exp
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # Conditional-GET response cache, keyed by ETag
+    RESPONSE_CACHE_MAX_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Live dashboard push: "local" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+    PUBSUB_BACKEND: str = "local"
+    PUBSUB_PING_SECONDS: int = 30  # liveness check of the LISTEN connection
+    PUBSUB_RECONNECT_MAX_SECONDS: int = 30
+    SSE_HEARTBEAT_SECONDS: int = 15
+
+    # Plan generation job queue (services.job_worker)
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_TIMEOUT_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: int = 10
+    JOB_STALE_AFTER_SECONDS: int = 900
+    JOB_MAINTENANCE_INTERVAL_SECONDS: int = 60
+    JOB_TTL_HOURS: int = 24
+
+    # Days of a week plan generated at once (each is an LLM call)
+    PLAN_GENERATION_CONCURRENCY: int = 7
+
+    # Foods offered to the planner per prompt, picked by services.food_candidates
+    PLAN_CANDIDATE_FOODS: int = 40
+
+    # Largest prompt (in tokens) any plan-generation node may send; 0 disables the cap
+    PROMPT_TOKEN_BUDGET: int = 0
 
     class Config:
         env_file = ".env"
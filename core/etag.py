@@ -0,0 +1,72 @@
+"""
+Conditional GET for per-user read endpoints.
+
+Every log write bumps `users.data_version` in its own transaction. An ETag
+is derived from that version plus the request path, query params and the
+user's local day, so `If-None-Match` can be answered with a 304 after one
+primary-key lookup instead of running the aggregation. Bodies for fresh
+ETags are kept in a small LRU so repeated polls skip the work too.
+"""
+import functools
+import hashlib
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.cache import TTLCache
+from core.config import settings
+from db.models.user import User
+from services.daily_totals import local_today, user_timezone
+
+response_cache = TTLCache(
+    maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def make_etag(request: Request, user, version: int) -> str:
+    tz_name = user_timezone(user)
+    parts = [
+        str(user.id),
+        str(version),
+        request.url.path,
+        "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items())),
+        tz_name,
+        local_today(tz_name).isoformat(),
+    ]
+    return '"' + hashlib.sha256("|".join(parts).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def conditional_get(func):
+    """
+    Serve an async `(request, ..., db: AsyncSession)` endpoint with an ETag,
+    answering matching `If-None-Match` headers with 304 Not Modified.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs["request"]
+        db: AsyncSession = kwargs["db"]
+        user = request.state.user
+
+        version = await db.scalar(select(User.data_version).where(User.id == user.id))
+        etag = make_etag(request, user, version or 0)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        body = response_cache.get(etag)
+        if body is None:
+            body = jsonable_encoder(await func(*args, **kwargs))
+            response_cache.set(etag, body)
+        return JSONResponse(body, headers=headers)
+
+    return wrapper
@@ -1,59 +1,182 @@
-from starlette.middleware.base import BaseHTTPMiddleware
+import logging
 from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
 import jwt
 from core.config import settings
-from db.session import get_db
+from core.query_stats import QueryStats, QueryBudgetExceeded, current_query_stats, route_query_registry
+from db.session import AsyncSessionLocal
 from db.models.user import User
-from sqlalchemy.orm import Session
+from auth.jwt_handler import verify_access_token
+from auth.user_cache import user_cache, cache_user
 
-class AuthAndOnboardingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        public_paths = [
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-        ]
+logger = logging.getLogger(__name__)
 
-        try:
-            if request.url.path in public_paths or request.url.path.startswith("/api/v1/auth"):
-                return await call_next(request)
+PUBLIC_PATHS = [
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+]
 
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                return JSONResponse(status_code=401, content={"detail": "Missing or invalid Authorization header"})
+class AuthAndOnboardingMiddleware:
+    """
+    Pure ASGI auth middleware. Unlike BaseHTTPMiddleware it passes the
+    response through untouched instead of re-streaming it via an extra task.
 
-            token = auth_header.split(" ")[1]
+    Authenticated requests get one AsyncSession for their whole lifetime:
+    the user is looked up on it (then detached, see authenticate) and
+    get_async_db hands the same session to async handlers. Sync handlers get a sync session from get_db only when
+    they ask for one.
+    """
 
-            try:
-                payload = jwt.decode(
-                    token,
-                    settings.JWT_SECRET,
-                    algorithms=[settings.JWT_ALGORITHM]
-                )
-            except jwt.ExpiredSignatureError:
-                return JSONResponse(status_code=401, content={"detail": "Token has expired"})
-            except jwt.InvalidTokenError:
-                return JSONResponse(status_code=401, content={"detail": "Invalid token"})
+    def __init__(self, app):
+        self.app = app
 
-            user_id: int = payload.get("sub")
-            if not user_id:
-                return JSONResponse(status_code=401, content={"detail": "Invalid token payload"})
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            db: Session = next(get_db())
-            try:
-                user = db.query(User).filter(User.id == user_id).first()
-            finally:
-                db.close()
+        response_started = False
+        state = scope.setdefault("state", {})
 
-            if not user:
-                return JSONResponse(status_code=401, content={"detail": "User not found"})
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-            if not user.is_onboarded and not request.url.path.startswith("/api/v1/onboarding"):
-                return JSONResponse(status_code=403, content={"detail": "Onboarding not completed"})
+        try:
+            response = await self.authenticate(scope)
+            if response is not None:
+                await response(scope, receive, send)
+                return
 
-            request.state.user = user
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
 
         except Exception as e:
+            if response_started:
+                raise
             # Always return clean JSON for unexpected errors
-            return JSONResponse(status_code=500, content={"detail": str(e)})
+            response = JSONResponse(status_code=500, content={"detail": str(e)})
+            await response(scope, receive, send)
+
+        finally:
+            db = state.pop("async_db", None)
+            if db is not None:
+                await db.close()
+
+    async def authenticate(self, scope):
+        """Return an error response, or None after attaching the user to the request state."""
+        path = scope["path"]
+        if path in PUBLIC_PATHS or path.startswith("/api/v1/auth"):
+            return None
+        # Operator endpoints are guarded by their own token, not user auth
+        if path.startswith("/api/v1/metrics"):
+            return None
+
+        auth_header = Headers(scope=scope).get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "Missing or invalid Authorization header"})
+
+        token = auth_header.split(" ")[1]
+
+        try:
+            payload = verify_access_token(token)
+        except jwt.ExpiredSignatureError:
+            return JSONResponse(status_code=401, content={"detail": "Token has expired"})
+        except jwt.InvalidTokenError:
+            return JSONResponse(status_code=401, content={"detail": "Invalid token"})
+
+        user_id = payload.get("sub")
+        if not user_id or not str(user_id).isdigit():
+            return JSONResponse(status_code=401, content={"detail": "Invalid token payload"})
+        user_id = int(user_id)
+
+        db = AsyncSessionLocal()
+        scope["state"]["async_db"] = db
+
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            # Attach the cached snapshot without emitting a SELECT
+            user = await db.merge(cached_user, load=False)
+        else:
+            user = await db.get(User, user_id)
+            if user:
+                cache_user(user)
+            # End the lookup's transaction so the connection goes back to the pool
+            # until the handler needs one (expire_on_commit is off, the user stays loaded)
+            await db.commit()
+
+        if not user:
+            return JSONResponse(status_code=401, content={"detail": "User not found"})
+        # Hand out a detached, fully loaded user: a handler rolling back this
+        # session must not expire it (a lazy reload can't run outside a greenlet)
+        db.expunge(user)
+
+        if not user.is_onboarded and not path.startswith("/api/v1/onboarding"):
+            return JSONResponse(status_code=403, content={"detail": "Onboarding not completed"})
+
+        scope["state"]["user"] = user
+        return None
+
+
+def _full_route_path(scope, route) -> str:
+    """
+    The matched route's path template including the prefix it was included
+    under (e.g. /api); depending on the FastAPI version `route.path` may
+    carry only the router's own prefix.
+    """
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if route.path_regex.match(path[start:]):
+            return path[:start] + route.path
+        start = path.find("/", start + 1)
+    return route.path
+
+
+class QueryStatsMiddleware:
+    """
+    Attributes every SQL statement of a request to its route. Add it last
+    so it wraps the auth middleware and counts the user lookup too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+
+        route = scope.get("route")
+        endpoint = scope.get("endpoint")
+        if route is not None and hasattr(route, "path"):
+            route_name = f"{scope['method']} {_full_route_path(scope, route)}"
+        elif endpoint is not None:
+            route_name = f"{scope['method']} {endpoint.__module__}.{endpoint.__name__}"
+        else:
+            route_name = "unmatched"
+        route_query_registry.record(route_name, stats)
+
+        budget = getattr(endpoint, "query_budget", None)
+        if budget is not None and stats.count > budget:
+            message = f"{route_name} issued {stats.count} queries, budget is {budget}"
+            if settings.SQL_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,19 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(logged_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor pointing at the last row of a page."""
+    raw = json.dumps([logged_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for anything it didn't produce."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        logged_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(logged_at), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,213 @@
+"""
+In-process pub/sub for pushing per-user change notifications to open
+streams (see /v1/dashboard/stream).
+
+`LocalPubSub` fans out to subscribers in this process only, which is all a
+single worker needs. With several workers set PUBSUB_BACKEND=postgres:
+publishes then go through Postgres NOTIFY on a pooled connection and every
+worker re-delivers them to its own local subscribers from a dedicated LISTEN
+connection, which is re-established with backoff if it drops.
+
+Sync handlers publish with `publish_on_commit`, which ties the message to
+their session's transaction. Process-wide state (like the auth user cache)
+listens with `add_handler` instead of a bounded subscriber queue, so none
+of its messages are dropped.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "nutriai_events"
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class LocalPubSub:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._handlers = defaultdict(list)
+        self._loop = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: dict):
+        self._deliver(channel, message)
+
+    def publish_on_commit(self, db: Session, channel: str, message: dict):
+        """Publish from sync code once `db` commits; nothing is sent if it rolls back."""
+        def deliver(session):
+            # Called from the handler's worker thread, the subscribers live on the event loop
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._deliver, channel, message)
+
+        event.listen(db, "after_commit", deliver, once=True)
+
+    def add_handler(self, channel: str, handler):
+        """Call `handler(message)` inline for every message on `channel`."""
+        self._handlers[channel].append(handler)
+
+    def _deliver(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Pub/sub handler for %s failed", channel)
+        for queue in list(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Subscribers re-read current state on wake-up, a dropped duplicate is harmless
+                pass
+
+    def _deliver_all(self, message: dict):
+        for channel in set(self._subscribers) | set(self._handlers):
+            self._deliver(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+
+class PostgresPubSub(LocalPubSub):
+    """
+    Cross-worker fan-out over LISTEN/NOTIFY.
+
+    Notifications arrive on one dedicated asyncpg connection that is watched
+    by a background task and reconnected with exponential backoff when it is
+    terminated or stops answering pings. Publishes use a pooled connection
+    from `engine`, so they never queue behind (or die with) the listener.
+    """
+
+    def __init__(self, dsn: str, engine):
+        super().__init__()
+        self.dsn = dsn
+        self.engine = engine
+        self._conn = None
+        self._lost = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        await super().start()
+        await self._listen()
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        self._stopping.set()
+        self._lost.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self._close()
+
+    async def publish(self, channel: str, message: dict):
+        payload = json.dumps({"channel": channel, "message": message})
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PG_CHANNEL, "payload": payload})
+            await conn.commit()
+
+    def publish_on_commit(self, db: Session, channel: str, message: dict):
+        # NOTIFY is transactional: Postgres sends it to every worker (this one
+        # included) when db commits, and discards it on rollback
+        payload = json.dumps({"channel": channel, "message": message})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PG_CHANNEL, "payload": payload})
+
+    async def _listen(self):
+        import asyncpg
+
+        self._lost.clear()
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(self._on_terminated)
+        await self._conn.add_listener(PG_CHANNEL, self._on_notify)
+
+    async def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close(timeout=5)
+            except Exception:
+                conn.terminate()
+
+    async def _supervise(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=settings.PUBSUB_PING_SECONDS)
+            except asyncio.TimeoutError:
+                # A silently dropped socket never fires the termination listener
+                try:
+                    await asyncio.wait_for(self._conn.execute("SELECT 1"), timeout=settings.PUBSUB_PING_SECONDS)
+                    continue
+                except Exception:
+                    self._lost.set()
+            if self._stopping.is_set():
+                break
+
+            logger.warning("Pub/sub LISTEN connection lost, reconnecting")
+            await self._close()
+            delay = 1.0
+            while not self._stopping.is_set():
+                try:
+                    await self._listen()
+                    break
+                except Exception as e:
+                    logger.warning("Pub/sub reconnect failed (%s), retrying in %.0fs", e, delay)
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    delay = min(delay * 2, settings.PUBSUB_RECONNECT_MAX_SECONDS)
+            else:
+                break
+
+            logger.info("Pub/sub LISTEN connection re-established")
+            # Anything published while disconnected was missed; have every stream re-read its state
+            self._deliver_all({"type": "updated"})
+
+    def _on_terminated(self, connection):
+        self._lost.set()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        event = json.loads(payload)
+        self._deliver(event["channel"], event["message"])
+
+
+def _create_pubsub():
+    if settings.PUBSUB_BACKEND == "postgres":
+        from db.session import async_engine
+
+        dsn = async_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresPubSub(dsn, async_engine)
+    return LocalPubSub()
+
+
+pubsub = _create_pubsub()
+
+
+async def notify_user_updated(user_id: int):
+    """Tell open streams the user's data changed; call after the write commits."""
+    try:
+        await pubsub.publish(user_channel(user_id), {"type": "updated"})
+    except Exception:
+        # The write already succeeded, a missed push only delays the client's refresh
+        logger.exception("Failed to publish update for user %s", user_id)
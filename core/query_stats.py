@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Stats for the request currently being served, set by QueryStatsMiddleware
+current_query_stats: ContextVar["QueryStats | None"] = ContextVar("current_query_stats", default=None)
+
+MAX_STATEMENT_LENGTH = 500
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """SQL statements issued while serving a single request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement[:MAX_STATEMENT_LENGTH]
+
+
+class RouteQueryRegistry:
+    """Per-route aggregate of QueryStats, served by the metrics endpoint."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: QueryStats):
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time_ms": 0.0,
+                "slowest_ms": 0.0,
+                "slowest_statement": None,
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["db_time_ms"] += stats.total_time * 1000
+            if stats.slowest_time * 1000 >= entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest_time * 1000
+                entry["slowest_statement"] = stats.slowest_statement
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    "avg_queries": entry["queries"] / entry["requests"],
+                    "avg_db_time_ms": round(entry["db_time_ms"] / entry["requests"], 3),
+                    "db_time_ms": round(entry["db_time_ms"], 3),
+                    "slowest_ms": round(entry["slowest_ms"], 3),
+                }
+                for route, entry in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_registry = RouteQueryRegistry()
+
+
+def query_budget(max_queries: int):
+    """Declare how many SQL statements a route may issue, auth lookup included."""
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def install(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -2,6 +2,9 @@
 DROP VIEW IF EXISTS food_logs_with_nutrients;
 
 -- Create the view
+-- Nutrients are scaled by services/nutrient_engine.py and snapshotted on
+-- food_logs at write time, so the view reads them instead of re-deriving
+-- unit conversions in SQL.
 CREATE OR REPLACE VIEW food_logs_with_nutrients AS
 SELECT
     fl.id AS log_id,
@@ -9,58 +12,12 @@ SELECT
     fi.name AS food_name,
     fl.quantity,
     fl.unit,
+    fl.logged_at,
 
-    -- Convert logged amount to grams
-    CASE
-        WHEN fl.unit = fi.reference_unit
-            THEN fl.quantity * fi.reference_amount
-        ELSE fl.quantity * COALESCE((fi.unit_conversions ->> fl.unit)::DECIMAL, 0)
-    END AS grams_consumed,
-
-    -- Nutrients calculation
-    ROUND(
-        fi.calories *
-        (
-            CASE
-                WHEN fl.unit = fi.reference_unit
-                    THEN fl.quantity
-                ELSE COALESCE((fl.quantity * (fi.unit_conversions ->> fl.unit)::DECIMAL) / fi.reference_amount, 0)
-            END
-        ), 2
-    ) AS total_calories,
-
-    ROUND(
-        fi.protein *
-        (
-            CASE
-                WHEN fl.unit = fi.reference_unit
-                    THEN fl.quantity
-                ELSE COALESCE((fl.quantity * (fi.unit_conversions ->> fl.unit)::DECIMAL) / fi.reference_amount, 0)
-            END
-        ), 2
-    ) AS total_protein,
-
-    ROUND(
-        fi.carbs *
-        (
-            CASE
-                WHEN fl.unit = fi.reference_unit
-                    THEN fl.quantity
-                ELSE COALESCE((fl.quantity * (fi.unit_conversions ->> fl.unit)::DECIMAL) / fi.reference_amount, 0)
-            END
-        ), 2
-    ) AS total_carbs,
-
-    ROUND(
-        fi.fats *
-        (
-            CASE
-                WHEN fl.unit = fi.reference_unit
-                    THEN fl.quantity
-                ELSE COALESCE((fl.quantity * (fi.unit_conversions ->> fl.unit)::DECIMAL) / fi.reference_amount, 0)
-            END
-        ), 2
-    ) AS total_fats
+    ROUND(fl.calories, 2) AS total_calories,
+    ROUND(fl.protein, 2) AS total_protein,
+    ROUND(fl.carbs, 2) AS total_carbs,
+    ROUND(fl.fats, 2) AS total_fats
 
 FROM food_logs fl
 JOIN food_items fi
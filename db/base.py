@@ -1,6 +1,5 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from core.config import settings
+from db.session import engine
 
 def get_connection():
-    return psycopg2.connect(settings.DATABASE_URL, cursor_factory=RealDictCursor)
+    # Raw DBAPI connection checked out of the shared pool; close() returns it
+    return engine.raw_connection()
@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+import traceback
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class LeakDetector:
+    """
+    Opt-in tracker for pooled connections that stay checked out too long.
+
+    Records the stack of every checkout and reports any connection still
+    held after `threshold_seconds`, which points straight at the code that
+    forgot to close its session.
+    """
+
+    def __init__(self, threshold_seconds: float):
+        self.threshold_seconds = threshold_seconds
+        self._checked_out = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        stack = "".join(traceback.format_stack()[:-1])
+        with self._lock:
+            self._checked_out[id(connection_record)] = {
+                "checked_out_at": time.monotonic(),
+                "stack": stack,
+                "reported": False,
+            }
+        # Piggyback on checkouts so long-held connections get logged without a watcher thread
+        self.report_leaks()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._checked_out.pop(id(connection_record), None)
+
+    def find_leaks(self, threshold_seconds: float | None = None) -> list[dict]:
+        threshold = self.threshold_seconds if threshold_seconds is None else threshold_seconds
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {"held_seconds": now - entry["checked_out_at"], "stack": entry["stack"]}
+                for entry in self._checked_out.values()
+                if now - entry["checked_out_at"] >= threshold
+            ]
+
+    def report_leaks(self) -> list[dict]:
+        now = time.monotonic()
+        leaks = []
+        with self._lock:
+            for entry in self._checked_out.values():
+                held = now - entry["checked_out_at"]
+                if held >= self.threshold_seconds and not entry["reported"]:
+                    entry["reported"] = True
+                    leaks.append({"held_seconds": held, "stack": entry["stack"]})
+
+        for leak in leaks:
+            logger.warning(
+                "Connection held for %.1fs without being returned to the pool. Checked out at:\n%s",
+                leak["held_seconds"], leak["stack"]
+            )
+        return leaks
+
+    def assert_no_leaks(self, threshold_seconds: float = 0):
+        """For tests: fail if any connection is still checked out once a request has finished."""
+        leaks = self.find_leaks(threshold_seconds)
+        if leaks:
+            stacks = "\n\n".join(
+                f"held {leak['held_seconds']:.2f}s, checked out at:\n{leak['stack']}" for leak in leaks
+            )
+            raise AssertionError(f"{len(leaks)} leaked DB connection(s):\n\n{stacks}")
@@ -7,4 +7,7 @@ from .user import User
 from .food import FoodItem, FoodLog
 from .workout import Workout, WorkoutLog
 from .plan import Reminder
-from .tracking import WaterLog, StepLog
\ No newline at end of file
+from .tracking import WaterLog, StepLog
+from .daily_totals import DailyUserTotal
+from .job import PlanJob
+from .prompt_stats import PromptTokenStat
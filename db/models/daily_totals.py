@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Date, DECIMAL, ForeignKey, TIMESTAMP
+from sqlalchemy.sql import func
+from . import Base
+
+class DailyUserTotal(Base):
+    """Per-user, per-local-day rollup kept in step with every log write."""
+    __tablename__ = "daily_user_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    local_date = Column(Date, primary_key=True)
+
+    food_count = Column(Integer, nullable=False, server_default="0")
+    calories_consumed = Column(DECIMAL(10, 2), nullable=False, server_default="0")
+    protein = Column(DECIMAL(10, 2), nullable=False, server_default="0")
+    carbs = Column(DECIMAL(10, 2), nullable=False, server_default="0")
+    fats = Column(DECIMAL(10, 2), nullable=False, server_default="0")
+
+    workout_count = Column(Integer, nullable=False, server_default="0")
+    calories_burned = Column(DECIMAL(10, 2), nullable=False, server_default="0")
+
+    water_ml = Column(Integer, nullable=False, server_default="0")
+    steps = Column(Integer, nullable=False, server_default="0")
+
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
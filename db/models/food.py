@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DECIMAL, JSON, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, Text, DECIMAL, JSON, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from . import Base
 
@@ -18,10 +18,24 @@ class FoodItem(Base):
 
 class FoodLog(Base):
     __tablename__ = "food_logs"
+    __table_args__ = (
+        # Also the keyset pagination order: (logged_at, id) within a user
+        Index("ix_food_logs_user_logged_at_id", "user_id", "logged_at", "id"),
+        {"postgresql_partition_by": "RANGE (logged_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     food_id = Column(Integer, ForeignKey("food_items.id"))
     quantity = Column(DECIMAL(6, 2), nullable=False)
     unit = Column(Text, nullable=False)
-    logged_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    # Nutrients scaled to this quantity, snapshotted when the log is written
+    calories = Column(DECIMAL(10, 2))
+    protein = Column(DECIMAL(10, 2))
+    carbs = Column(DECIMAL(10, 2))
+    fats = Column(DECIMAL(10, 2))
+    vitamins = Column(JSON)
+
+    # Partition key, so it is part of the primary key
+    logged_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from . import Base
+
+class PlanJob(Base):
+    """A queued AI plan generation, claimed by services.job_worker."""
+    __tablename__ = "plan_jobs"
+    __table_args__ = (
+        # Claim query: oldest due pending job
+        Index("ix_plan_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(String(36), primary_key=True)  # task_id handed to the client
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(Text, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    status = Column(Text, nullable=False, server_default="pending")  # pending | processing | completed | failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="3")
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    locked_by = Column(Text, nullable=True)
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
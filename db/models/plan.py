@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, TIMESTAMP, Boolean, DECIMAL
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, TIMESTAMP, Boolean, DECIMAL, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from . import Base
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        Index("ix_plans_user_name", "user_id", "name"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     name = Column(Text, nullable=False)
@@ -21,6 +24,9 @@ class Plan(Base):
 
 class PlanItem(Base):
     __tablename__ = "plan_items"
+    __table_args__ = (
+        Index("ix_plan_items_plan_id", "plan_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey("plans.id"))
     food_id = Column(Integer, ForeignKey("food_items.id"))
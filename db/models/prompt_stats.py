@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, Text, TIMESTAMP
+from sqlalchemy.sql import func
+from . import Base
+
+class PromptTokenStat(Base):
+    """Per-node prompt size totals, shared by the API processes and the job worker."""
+    __tablename__ = "prompt_token_stats"
+
+    node = Column(Text, primary_key=True)
+    # Process kind that ran the node: "api" or "worker"
+    reported_by = Column(Text, nullable=False)
+
+    prompts = Column(BigInteger, nullable=False, server_default="0")
+    tokens = Column(BigInteger, nullable=False, server_default="0")
+    max_tokens = Column(Integer, nullable=False, server_default="0")
+
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, Date, ForeignKey
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import date
 from . import Base
 
 class WaterLog(Base):
     __tablename__ = "water_logs"
+    __table_args__ = (
+        Index("ix_water_logs_user_date", "user_id", "date", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     date = Column(Date, default=date.today, index=True)
@@ -15,6 +18,9 @@ class WaterLog(Base):
 
 class StepLog(Base):
     __tablename__ = "step_logs"
+    __table_args__ = (
+        Index("ix_step_logs_user_date", "user_id", "date", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     date = Column(Date, default=date.today, index=True)
@@ -23,6 +23,8 @@ class User(Base):
     is_onboarded = Column(Boolean, default=False)
     allergies = Column(Text, nullable=True)
     budget = Column(Text, nullable=True)
+    timezone = Column(Text, nullable=True)  # IANA name; None means settings.DEFAULT_TIMEZONE
+    data_version = Column(Integer, nullable=False, server_default="0")  # bumped on every log write, feeds ETags
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     water_logs = relationship("WaterLog", back_populates="user")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DECIMAL, ARRAY, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, Text, DECIMAL, ARRAY, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from . import Base
 
@@ -14,8 +14,13 @@ class Workout(Base):
 
 class WorkoutLog(Base):
     __tablename__ = "workout_logs"
+    __table_args__ = (
+        # Also the keyset pagination order: (logged_at, id) within a user
+        Index("ix_workout_logs_user_logged_at_id", "user_id", "logged_at", "id"),
+        {"postgresql_partition_by": "RANGE (logged_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     workout_id = Column(Integer, ForeignKey("workouts.id"))
     sets = Column(Integer)
@@ -23,4 +28,5 @@ class WorkoutLog(Base):
     total_reps = Column(Integer)  # only for strength workouts
     duration_minutes = Column(Integer)  # for time-based workouts
     estimated_calories = Column(DECIMAL(6, 2))
-    logged_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Partition key, so it is part of the primary key
+    logged_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
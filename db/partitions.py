@@ -0,0 +1,145 @@
+"""
+Monthly range partitions for the append-only log tables.
+
+Run `python -m db.partitions` from cron to create upcoming partitions and
+apply the retention policy; the app creates upcoming partitions on startup and
+the job worker tops them up on its maintenance schedule. Rows outside every
+monthly range land in the `<table>_default` partition instead of failing the
+insert, and are moved into their month when that partition is created.
+"""
+import logging
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from core.config import settings
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("food_logs", "workout_logs")
+
+# Serialises partition DDL across app workers and the cron job
+PARTITION_LOCK_ID = 7_305_118_204
+
+def add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month_start: date) -> str:
+    return f"{table}_y{month_start.year}m{month_start.month:02d}"
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+def current_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return date(today.year, today.month, 1)
+
+def ensure_partitions(conn, table: str, start: date, end: date):
+    """
+    Create monthly partitions of `table` covering [start, end).
+
+    A partition can't be created while the default partition holds rows in its
+    range, so those rows are moved into a standalone table which is then
+    attached as the month's partition.
+    """
+    existing = {name for name, _ in list_partitions(conn, table)}
+    default = default_partition_name(table)
+    month = date(start.year, start.month, 1)
+    while month < end:
+        next_month = add_months(month, 1)
+        name = partition_name(table, month)
+        if name not in existing:
+            lower, upper = f"{month.isoformat()} 00:00:00+00", f"{next_month.isoformat()} 00:00:00+00"
+            conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            moved = conn.execute(text(
+                f"WITH moved AS ("
+                f"DELETE FROM {default} WHERE logged_at >= :lower AND logged_at < :upper RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved"
+            ), {"lower": lower, "upper": upper}).rowcount
+            conn.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            ))
+            if moved:
+                logger.warning("Moved %s rows of %s from %s into %s", moved, table, default, name)
+        month = next_month
+
+def list_partitions(conn, table: str) -> list[tuple[str, date]]:
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table}).scalars()
+
+    partitions = []
+    prefix = f"{table}_y"
+    for name in rows:
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        year, _, month = suffix.partition("m")
+        if year.isdigit() and month.isdigit():
+            partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+def apply_retention(conn, table: str, retention_months: int, action: str) -> list[str]:
+    """
+    Detach partitions whose whole month is older than `retention_months`.
+    With action "drop" the detached tables are dropped, otherwise they are
+    left in place as standalone tables for archival.
+    """
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(current_month(), -retention_months)
+    removed = []
+    for name, month_start in list_partitions(conn, table):
+        if add_months(month_start, 1) > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if action == "drop":
+            conn.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+        logger.info("Retention: %s partition %s of %s", action, name, table)
+    return removed
+
+def check_coverage(conn, table: str, min_months: int) -> bool:
+    """Warn when fewer than `min_months` future months are covered or rows sit in the default partition."""
+    months = {month for _, month in list_partitions(conn, table)}
+    start = current_month()
+    covered = 0
+    while add_months(start, covered + 1) in months:
+        covered += 1
+
+    ok = True
+    if start not in months or covered < min_months:
+        logger.error(
+            "Partition coverage for %s is %s months ahead (minimum %s); run `python -m db.partitions`",
+            table, covered if start in months else -1, min_months,
+        )
+        ok = False
+
+    stray = conn.execute(text(f"SELECT count(*) FROM {default_partition_name(table)}")).scalar()
+    if stray:
+        logger.warning("%s rows of %s are in the default partition", stray, table)
+        ok = False
+    return ok
+
+def ensure_future_partitions(months_ahead: int | None = None):
+    months_ahead = settings.LOG_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    start = current_month()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+        for table in PARTITIONED_TABLES:
+            ensure_partitions(conn, table, start, add_months(start, months_ahead + 1))
+            check_coverage(conn, table, settings.LOG_PARTITION_MIN_MONTHS_AHEAD)
+
+def run_maintenance():
+    ensure_future_partitions()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+        for table in PARTITIONED_TABLES:
+            apply_retention(conn, table, settings.LOG_RETENTION_MONTHS, settings.LOG_RETENTION_ACTION)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_maintenance()
@@ -1,17 +1,65 @@
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
+from db.leak_detector import LeakDetector
+from core import query_stats
+from db.pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
 
 # SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options)
+
+# Async engine for the hot endpoints, same database through asyncpg
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL
+    or make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options
+)
+
+# Per-request query counts and timings, attributed to routes by QueryStatsMiddleware
+query_stats.install(engine)
+query_stats.install(async_engine.sync_engine)
 
-# Session factory
+leak_detector = LeakDetector(settings.DB_LEAK_THRESHOLD_SECONDS)
+if settings.DB_LEAK_DETECTION:
+    leak_detector.install(engine)
+    leak_detector.install(async_engine.sync_engine)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Dependency for FastAPI endpoints
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
     try:
+        # Re-attach the authenticated user here (no SELECT) so sync handlers can modify it
+        user = getattr(request.state, "user", None)
+        if user is not None:
+            request.state.user = db.merge(user, load=False)
         yield db
     finally:
         db.close()
+
+
+# Async dependency for FastAPI endpoints
+async def get_async_db(request: Request):
+    # Reuse the request-scoped session opened by the auth middleware; it owns closing it
+    db = getattr(request.state, "async_db", None)
+    if db is not None:
+        yield db
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
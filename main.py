@@ -1,14 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from psycopg2.extras import RealDictCursor
 from db.base import get_connection
 from auth.hashing import hash_password
 from auth.jwt_handler import create_access_token
-from core.middleware import AuthAndOnboardingMiddleware
+from core.middleware import AuthAndOnboardingMiddleware, QueryStatsMiddleware
+from db.partitions import ensure_future_partitions
+from core.pubsub import pubsub
 
 from api import api_router
 
-app = FastAPI(title="NutriAI Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log inserts fail without a partition for the current month
+    ensure_future_partitions()
+    await pubsub.start()
+    yield
+    await pubsub.stop()
+
+app = FastAPI(title="NutriAI Backend", lifespan=lifespan)
 
 app.add_middleware(AuthAndOnboardingMiddleware)
+app.add_middleware(QueryStatsMiddleware)
 
 # Mount the API router under /api
 app.include_router(api_router, prefix="/api")
@@ -21,7 +34,7 @@ def health():
 @app.get("/test-db")
 def test_db():
     conn = get_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute("SELECT version();")
     result = cur.fetchone()
     conn.close()
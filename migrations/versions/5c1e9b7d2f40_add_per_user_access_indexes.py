@@ -0,0 +1,39 @@
+"""add per-user access indexes
+
+Revision ID: 5c1e9b7d2f40
+Revises: a340e1c652ef
+Create Date: 2026-10-18 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9b7d2f40'
+down_revision: Union[str, Sequence[str], None] = 'a340e1c652ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Log listings, summaries and dashboards all filter by user + logged_at range
+    op.create_index("ix_food_logs_user_logged_at", "food_logs", ["user_id", "logged_at"], unique=False)
+    op.create_index("ix_workout_logs_user_logged_at", "workout_logs", ["user_id", "logged_at"], unique=False)
+
+    # Plan lookups by owner + name, and plan items by plan
+    op.create_index("ix_plans_user_name", "plans", ["user_id", "name"], unique=False)
+    op.create_index("ix_plan_items_plan_id", "plan_items", ["plan_id"], unique=False)
+
+    # water_logs / step_logs already have unique (user_id, date) indexes from 70767db6f690
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_plan_items_plan_id", table_name="plan_items")
+    op.drop_index("ix_plans_user_name", table_name="plans")
+    op.drop_index("ix_workout_logs_user_logged_at", table_name="workout_logs")
+    op.drop_index("ix_food_logs_user_logged_at", table_name="food_logs")
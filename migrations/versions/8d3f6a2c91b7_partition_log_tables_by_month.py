@@ -0,0 +1,125 @@
+"""partition food_logs and workout_logs by month
+
+Revision ID: 8d3f6a2c91b7
+Revises: 5c1e9b7d2f40
+Create Date: 2026-10-18 11:04:19.227630
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6a2c91b7'
+down_revision: Union[str, Sequence[str], None] = '5c1e9b7d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month; db.partitions keeps this topped up
+MONTHS_AHEAD = 3
+
+TABLES = {
+    "food_logs": """
+        user_id INTEGER REFERENCES users (id),
+        food_id INTEGER REFERENCES food_items (id),
+        quantity DECIMAL(6, 2) NOT NULL,
+        unit TEXT NOT NULL,
+    """,
+    "workout_logs": """
+        user_id INTEGER REFERENCES users (id),
+        workout_id INTEGER REFERENCES workouts (id),
+        sets INTEGER,
+        reps_per_set INTEGER,
+        total_reps INTEGER,
+        duration_minutes INTEGER,
+        estimated_calories DECIMAL(6, 2),
+    """,
+}
+
+COLUMNS = {
+    "food_logs": "id, user_id, food_id, quantity, unit",
+    "workout_logs": "id, user_id, workout_id, sets, reps_per_set, total_reps, duration_minutes, estimated_calories",
+}
+
+
+def _add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_old(table: str) -> None:
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_old_pkey")
+    op.execute(f"ALTER INDEX ix_{table}_id RENAME TO ix_{table}_old_id")
+    op.execute(f"ALTER INDEX ix_{table}_user_logged_at RENAME TO ix_{table}_old_user_logged_at")
+    # Keep the id sequence alive when the old table is dropped
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    last_month = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD + 1)
+
+    for table, columns in TABLES.items():
+        _rename_old(table)
+        op.execute(f"""
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'),
+                {columns}
+                logged_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, logged_at)
+            ) PARTITION BY RANGE (logged_at)
+        """)
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.create_index(f"ix_{table}_id", table, ["id"], unique=False)
+        op.create_index(f"ix_{table}_user_logged_at", table, ["user_id", "logged_at"], unique=False)
+
+        # One partition per month from the oldest existing row up to MONTHS_AHEAD from now
+        oldest = conn.execute(sa.text(f"SELECT min(logged_at) FROM {table}_old")).scalar()
+        start = oldest.astimezone(timezone.utc).date() if oldest else today
+        month = date(start.year, start.month, 1)
+        while month < last_month:
+            next_month = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{next_month.isoformat()} 00:00:00+00')"
+            )
+            month = next_month
+
+        op.execute(f"""
+            INSERT INTO {table} ({COLUMNS[table]}, logged_at)
+            SELECT {COLUMNS[table]}, COALESCE(logged_at, now()) FROM {table}_old
+        """)
+        op.execute(f"DROP TABLE {table}_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey")
+        op.execute(f"ALTER INDEX ix_{table}_id RENAME TO ix_{table}_partitioned_id")
+        op.execute(f"ALTER INDEX ix_{table}_user_logged_at RENAME TO ix_{table}_partitioned_user_logged_at")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"""
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'),
+                {columns}
+                logged_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                PRIMARY KEY (id)
+            )
+        """)
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.create_index(f"ix_{table}_id", table, ["id"], unique=False)
+        op.create_index(f"ix_{table}_user_logged_at", table, ["user_id", "logged_at"], unique=False)
+        op.execute(f"""
+            INSERT INTO {table} ({COLUMNS[table]}, logged_at)
+            SELECT {COLUMNS[table]}, logged_at FROM {table}_partitioned
+        """)
+        # Drops every attached partition with it
+        op.execute(f"DROP TABLE {table}_partitioned")
@@ -0,0 +1,49 @@
+"""add plan_jobs queue table
+
+Revision ID: a7d2e5f9c4b1
+Revises: f6c1d4e8b3a2
+Create Date: 2026-10-18 17:20:33.942716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e5f9c4b1'
+down_revision: Union[str, Sequence[str], None] = 'f6c1d4e8b3a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('plan_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.Text(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Text(), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False),
+    sa.Column('run_after', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('locked_by', sa.Text(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_plan_jobs_status_run_after', 'plan_jobs', ['status', 'run_after'], unique=False)
+    op.create_index(op.f('ix_plan_jobs_user_id'), 'plan_jobs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_plan_jobs_user_id'), table_name='plan_jobs')
+    op.drop_index('ix_plan_jobs_status_run_after', table_name='plan_jobs')
+    op.drop_table('plan_jobs')
@@ -0,0 +1,79 @@
+"""add nutrient snapshot columns to food_logs
+
+Revision ID: b7e2c4d8a1f3
+Revises: 8d3f6a2c91b7
+Create Date: 2026-10-18 12:21:05.914377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4d8a1f3'
+down_revision: Union[str, Sequence[str], None] = '8d3f6a2c91b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('food_logs', sa.Column('calories', sa.DECIMAL(precision=10, scale=2), nullable=True))
+    op.add_column('food_logs', sa.Column('protein', sa.DECIMAL(precision=10, scale=2), nullable=True))
+    op.add_column('food_logs', sa.Column('carbs', sa.DECIMAL(precision=10, scale=2), nullable=True))
+    op.add_column('food_logs', sa.Column('fats', sa.DECIMAL(precision=10, scale=2), nullable=True))
+    op.add_column('food_logs', sa.Column('vitamins', sa.JSON(), nullable=True))
+
+    # Backfill with the same scaling create_food_log applies; unknown units scale to 0
+    op.execute("""
+        WITH factors AS (
+            SELECT
+                fl.id,
+                fl.logged_at,
+                CASE
+                    WHEN fl.unit = fi.reference_unit
+                        THEN fl.quantity / fi.reference_amount
+                    ELSE COALESCE(fl.quantity * (fi.unit_conversions ->> fl.unit)::DECIMAL / fi.reference_amount, 0)
+                END AS factor,
+                fi.calories,
+                fi.protein,
+                fi.carbs,
+                fi.fats,
+                fi.vitamins
+            FROM food_logs fl
+            JOIN food_items fi ON fi.id = fl.food_id
+        )
+        UPDATE food_logs fl
+        SET
+            calories = ROUND(factors.calories * factors.factor, 2),
+            protein = ROUND(factors.protein * factors.factor, 2),
+            carbs = ROUND(factors.carbs * factors.factor, 2),
+            fats = ROUND(factors.fats * factors.factor, 2),
+            vitamins = (
+                SELECT COALESCE(
+                    json_object_agg(
+                        v.key,
+                        CASE
+                            WHEN json_typeof(v.value) = 'number'
+                                THEN to_json(v.value::text::DECIMAL * factors.factor)
+                            ELSE v.value
+                        END
+                    ),
+                    '{}'::json
+                )
+                FROM json_each(factors.vitamins) AS v
+            )
+        FROM factors
+        WHERE fl.id = factors.id AND fl.logged_at = factors.logged_at
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('food_logs', 'vitamins')
+    op.drop_column('food_logs', 'fats')
+    op.drop_column('food_logs', 'carbs')
+    op.drop_column('food_logs', 'protein')
+    op.drop_column('food_logs', 'calories')
@@ -0,0 +1,33 @@
+"""add default partitions for food_logs and workout_logs
+
+Revision ID: b8e3f6a1d5c2
+Revises: a7d2e5f9c4b1
+Create Date: 2026-10-18 16:12:40.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f6a1d5c2'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e5f9c4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("food_logs", "workout_logs")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Catch-all so inserts outside the monthly ranges don't fail; db.partitions moves them out
+    for table in TABLES:
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TABLE {table}_default")
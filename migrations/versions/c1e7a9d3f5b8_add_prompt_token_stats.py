@@ -0,0 +1,36 @@
+"""add prompt_token_stats table
+
+Revision ID: c1e7a9d3f5b8
+Revises: b8e3f6a1d5c2
+Create Date: 2026-10-18 18:05:12.630914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e7a9d3f5b8'
+down_revision: Union[str, Sequence[str], None] = 'b8e3f6a1d5c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('prompt_token_stats',
+    sa.Column('node', sa.Text(), nullable=False),
+    sa.Column('reported_by', sa.Text(), nullable=False),
+    sa.Column('prompts', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('tokens', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('max_tokens', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('node')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('prompt_token_stats')
@@ -0,0 +1,33 @@
+"""extend log indexes with id for keyset pagination
+
+Revision ID: c93a5e1f7d24
+Revises: b7e2c4d8a1f3
+Create Date: 2026-10-18 13:02:48.660157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93a5e1f7d24'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c4d8a1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, logged_at, id) serves the range filters and the (logged_at, id) < cursor seek alike
+    for table in ("food_logs", "workout_logs"):
+        op.create_index(f"ix_{table}_user_logged_at_id", table, ["user_id", "logged_at", "id"], unique=False)
+        op.drop_index(f"ix_{table}_user_logged_at", table_name=table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("food_logs", "workout_logs"):
+        op.create_index(f"ix_{table}_user_logged_at", table, ["user_id", "logged_at"], unique=False)
+        op.drop_index(f"ix_{table}_user_logged_at_id", table_name=table)
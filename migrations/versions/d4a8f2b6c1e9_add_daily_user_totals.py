@@ -0,0 +1,81 @@
+"""add daily_user_totals rollup table
+
+Revision ID: d4a8f2b6c1e9
+Revises: c93a5e1f7d24
+Create Date: 2026-10-18 15:02:41.287519
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8f2b6c1e9'
+down_revision: Union[str, Sequence[str], None] = 'c93a5e1f7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of services.daily_totals.REBUILD_SQL as of this revision.
+# users.timezone doesn't exist yet, so every log is bucketed by one timezone:
+# DEFAULT_TIMEZONE from the environment, else the app's default at the time.
+BACKFILL_TIMEZONE = os.environ.get("DEFAULT_TIMEZONE", "Asia/Kolkata")
+
+BACKFILL_SQL = """
+    INSERT INTO daily_user_totals (
+        user_id, local_date, food_count, calories_consumed, protein, carbs, fats,
+        workout_count, calories_burned, water_ml, steps
+    )
+    SELECT
+        user_id, local_date,
+        SUM(food_count), SUM(calories_consumed), SUM(protein), SUM(carbs), SUM(fats),
+        SUM(workout_count), SUM(calories_burned), SUM(water_ml), SUM(steps)
+    FROM (
+        SELECT user_id, (logged_at AT TIME ZONE :tz)::date AS local_date,
+               1 AS food_count, COALESCE(calories, 0) AS calories_consumed,
+               COALESCE(protein, 0) AS protein, COALESCE(carbs, 0) AS carbs, COALESCE(fats, 0) AS fats,
+               0 AS workout_count, 0 AS calories_burned, 0 AS water_ml, 0 AS steps
+        FROM food_logs
+        UNION ALL
+        SELECT user_id, (logged_at AT TIME ZONE :tz)::date,
+               0, 0, 0, 0, 0, 1, COALESCE(estimated_calories, 0), 0, 0
+        FROM workout_logs
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, 0, 0, 0, amount, 0
+        FROM water_logs
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, 0, 0, 0, 0, steps
+        FROM step_logs
+    ) contributions
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, local_date
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_user_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('food_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('calories_consumed', sa.DECIMAL(precision=10, scale=2), server_default='0', nullable=False),
+    sa.Column('protein', sa.DECIMAL(precision=10, scale=2), server_default='0', nullable=False),
+    sa.Column('carbs', sa.DECIMAL(precision=10, scale=2), server_default='0', nullable=False),
+    sa.Column('fats', sa.DECIMAL(precision=10, scale=2), server_default='0', nullable=False),
+    sa.Column('workout_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('calories_burned', sa.DECIMAL(precision=10, scale=2), server_default='0', nullable=False),
+    sa.Column('water_ml', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('steps', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'local_date')
+    )
+    # Backfill existing history
+    op.execute(sa.text(BACKFILL_SQL).bindparams(tz=BACKFILL_TIMEZONE))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_user_totals')
@@ -0,0 +1,28 @@
+"""add timezone to users
+
+Revision ID: e5b9c3a7d2f8
+Revises: d4a8f2b6c1e9
+Create Date: 2026-10-18 15:48:12.604371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c3a7d2f8'
+down_revision: Union[str, Sequence[str], None] = 'd4a8f2b6c1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('timezone', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,28 @@
+"""add data_version to users
+
+Revision ID: f6c1d4e8b3a2
+Revises: e5b9c3a7d2f8
+Create Date: 2026-10-18 16:31:57.118240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c1d4e8b3a2'
+down_revision: Union[str, Sequence[str], None] = 'e5b9c3a7d2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
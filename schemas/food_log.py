@@ -1,13 +1,16 @@
-from pydantic import BaseModel, condecimal
+from pydantic import BaseModel, Field, condecimal
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
 class FoodLogCreate(BaseModel):
     food_id: int
     quantity: Annotated[Decimal, condecimal(gt=0)]  # in given unit
     unit: str
 
+class FoodLogBatchCreate(BaseModel):
+    items: List[FoodLogCreate] = Field(..., min_length=1, max_length=100)
+
 class FoodLogResponse(BaseModel):
     id: int
     food_id: int
@@ -24,6 +27,10 @@ class FoodLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FoodLogPage(BaseModel):
+    items: List[FoodLogResponse]
+    next_cursor: Optional[str] = None
+
 class DailyFoodSummary(BaseModel):
     date: date
     calories: float
@@ -34,6 +41,7 @@ class DailyFoodSummary(BaseModel):
 
 class FoodSummaryResponse(BaseModel):
     days: int
+    granularity: str = "day"  # each `daily` entry is a bucket starting on its date
     range_start: date
     range_end: date
     total_calories: float
@@ -10,7 +10,7 @@ class WaterCreate(WaterBase):
 class WaterOut(WaterBase):
     date: date
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class StepBase(BaseModel):
@@ -22,4 +22,4 @@ class StepCreate(StepBase):
 class StepOut(StepBase):
     date: date
     class Config:
-        orm_mode = True
+        from_attributes = True
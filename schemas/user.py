@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
+import pytz
 from typing import Optional, List, Literal
 from enum import Enum
 
@@ -65,6 +66,7 @@ class UserResponse(BaseModel):
     is_onboarded: bool
     allergies: Optional[str] = None
     budget: Optional[str] = None
+    timezone: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -90,4 +92,12 @@ class UserUpdateMe(BaseModel):
     weight_kg: Optional[float] = None
     dietary_prefs: Optional[List[str]] = None
     allergies: Optional[str] = None
-    budget: Optional[str] = None
\ No newline at end of file
+    budget: Optional[str] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value):
+        if value is not None and value not in pytz.all_timezones_set:
+            raise ValueError("Unknown timezone")
+        return value
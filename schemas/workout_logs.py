@@ -25,6 +25,10 @@ class WorkoutLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WorkoutLogPage(BaseModel):
+    items: List[WorkoutLogResponse]
+    next_cursor: Optional[str] = None
+
 class DailyWorkoutSummary(BaseModel):
     date: date
     workouts: int
@@ -35,6 +39,7 @@ class DailyWorkoutSummary(BaseModel):
 
 class WorkoutSummaryResponse(BaseModel):
     days: int
+    granularity: str = "day"  # each `daily` entry is a bucket starting on its date
     range_start: date
     range_end: date
     total_workouts: int
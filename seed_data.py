@@ -39,7 +39,9 @@ def seed_food_items(session: Session):
 
 def main():
     from db.models import Base  # Ensure models are loaded
+    from db.partitions import ensure_future_partitions
     Base.metadata.create_all(bind=engine)  # Create tables if not exist
+    ensure_future_partitions()
 
     with SessionLocal() as session:
         seed_workouts(session)
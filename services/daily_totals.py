@@ -0,0 +1,199 @@
+"""
+Maintenance of the daily_user_totals rollup.
+
+Every log write adds its contribution to the user's row for that local
+day inside the same transaction, so the summary and dashboard routes read
+one row per day instead of re-aggregating raw logs. `rebuild` recomputes
+rows from the logs for backfills:
+
+    python -m services.daily_totals rebuild [--user USER_ID]
+"""
+import argparse
+import logging
+from datetime import date, datetime, time, timedelta
+from pytz import timezone
+from typing import Literal
+from sqlalchemy import text, update, cast, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from core.config import settings
+from db.models.daily_totals import DailyUserTotal
+from db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def user_timezone(user) -> str:
+    """The user's own timezone, falling back to DEFAULT_TIMEZONE."""
+    return getattr(user, "timezone", None) or settings.DEFAULT_TIMEZONE
+
+def local_today(tz_name: str | None = None) -> date:
+    return datetime.now(timezone(tz_name or settings.DEFAULT_TIMEZONE)).date()
+
+def local_day_bounds(day: date, tz_name: str | None = None) -> tuple[datetime, datetime]:
+    """Aware [start, end) instants of `day` in the given timezone."""
+    tz = timezone(tz_name or settings.DEFAULT_TIMEZONE)
+    start = tz.localize(datetime.combine(day, time.min))
+    end = tz.localize(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+def local_date_of(moment: datetime, tz_name: str | None = None) -> date:
+    return moment.astimezone(timezone(tz_name or settings.DEFAULT_TIMEZONE)).date()
+
+
+# ---- Downsampling ----
+Granularity = Literal["day", "week", "month"]
+
+def bucket_of(column, granularity: Granularity):
+    """SQL start date of the day/week/month bucket `column` falls in; weeks start on Monday."""
+    if granularity == "day":
+        return column
+    return cast(func.date_trunc(granularity, column), Date)
+
+def bucket_start(day: date, granularity: Granularity) -> date:
+    """Python twin of bucket_of."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def bucket_interval(granularity: Granularity):
+    return text(f"interval '1 {granularity}'")
+
+
+async def bump_data_version(db: AsyncSession, user_id: int):
+    """
+    Invalidate the user's ETags (see core.etag); runs inside the writing transaction.
+
+    Writers call this before touching daily_user_totals so every transaction
+    locks the users row first, matching update_me and rebuild.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+
+async def add_to_daily_totals(db: AsyncSession, user_id: int, local_date: date, **increments):
+    """Upsert `increments` onto the (user_id, local_date) row; the caller commits."""
+    stmt = insert(DailyUserTotal).values(user_id=user_id, local_date=local_date, **increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyUserTotal.user_id, DailyUserTotal.local_date],
+        set_={
+            **{name: getattr(DailyUserTotal, name) + stmt.excluded[name] for name in increments},
+            "updated_at": func.now(),
+        }
+    )
+    await db.execute(stmt)
+
+async def record_food_logs(db: AsyncSession, user, logs):
+    tz_name = user_timezone(user)
+    days = {}
+    for log in logs:
+        day = days.setdefault(local_date_of(log.logged_at, tz_name), {
+            "food_count": 0, "calories_consumed": 0.0, "protein": 0.0, "carbs": 0.0, "fats": 0.0
+        })
+        day["food_count"] += 1
+        day["calories_consumed"] += float(log.calories or 0)
+        day["protein"] += float(log.protein or 0)
+        day["carbs"] += float(log.carbs or 0)
+        day["fats"] += float(log.fats or 0)
+
+    await bump_data_version(db, user.id)
+    for local_date, increments in days.items():
+        await add_to_daily_totals(db, user.id, local_date, **increments)
+
+async def record_workout_log(db: AsyncSession, user, log):
+    await bump_data_version(db, user.id)
+    await add_to_daily_totals(
+        db, user.id, local_date_of(log.logged_at, user_timezone(user)),
+        workout_count=1,
+        calories_burned=float(log.estimated_calories or 0)
+    )
+
+async def record_water(db: AsyncSession, user_id: int, log_date: date, amount: int):
+    await bump_data_version(db, user_id)
+    await add_to_daily_totals(db, user_id, log_date, water_ml=amount)
+
+async def record_steps(db: AsyncSession, user_id: int, log_date: date, steps: int):
+    await bump_data_version(db, user_id)
+    await add_to_daily_totals(db, user_id, log_date, steps=steps)
+
+
+# ---- Rebuild ----
+REBUILD_SQL = """
+    INSERT INTO daily_user_totals (
+        user_id, local_date, food_count, calories_consumed, protein, carbs, fats,
+        workout_count, calories_burned, water_ml, steps
+    )
+    SELECT
+        user_id, local_date,
+        SUM(food_count), SUM(calories_consumed), SUM(protein), SUM(carbs), SUM(fats),
+        SUM(workout_count), SUM(calories_burned), SUM(water_ml), SUM(steps)
+    FROM (
+        SELECT fl.user_id, (fl.logged_at AT TIME ZONE COALESCE(u.timezone, :tz))::date AS local_date,
+               1 AS food_count, COALESCE(fl.calories, 0) AS calories_consumed,
+               COALESCE(fl.protein, 0) AS protein, COALESCE(fl.carbs, 0) AS carbs, COALESCE(fl.fats, 0) AS fats,
+               0 AS workout_count, 0 AS calories_burned, 0 AS water_ml, 0 AS steps
+        FROM food_logs fl JOIN users u ON u.id = fl.user_id
+        UNION ALL
+        SELECT wl.user_id, (wl.logged_at AT TIME ZONE COALESCE(u.timezone, :tz))::date,
+               0, 0, 0, 0, 0, 1, COALESCE(wl.estimated_calories, 0), 0, 0
+        FROM workout_logs wl JOIN users u ON u.id = wl.user_id
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, 0, 0, 0, amount, 0
+        FROM water_logs
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, 0, 0, 0, 0, steps
+        FROM step_logs
+    ) contributions
+    WHERE {user_filter}
+    GROUP BY user_id, local_date
+    ON CONFLICT (user_id, local_date) DO UPDATE SET
+        food_count = EXCLUDED.food_count,
+        calories_consumed = EXCLUDED.calories_consumed,
+        protein = EXCLUDED.protein,
+        carbs = EXCLUDED.carbs,
+        fats = EXCLUDED.fats,
+        workout_count = EXCLUDED.workout_count,
+        calories_burned = EXCLUDED.calories_burned,
+        water_ml = EXCLUDED.water_ml,
+        steps = EXCLUDED.steps,
+        updated_at = now()
+"""
+
+def rebuild(conn, user_id: int | None = None, tz: str | None = None) -> int:
+    """
+    Recompute rollup rows from the raw logs, for every user or just `user_id`.
+    Food and workout logs are bucketed by each user's own timezone.
+
+    The users row is locked first (the data_version bump), the same order the
+    record_* writers use, so concurrent log writes wait for the rebuild to
+    commit instead of interleaving with the DELETE and INSERT.
+    """
+    user_filter = "TRUE" if user_id is None else "user_id = :user_id"
+    version_filter = "TRUE" if user_id is None else "id = :user_id"
+    params = {"tz": tz or settings.DEFAULT_TIMEZONE, "user_id": user_id}
+
+    # Cached responses were built from the old rows
+    conn.execute(text(f"UPDATE users SET data_version = data_version + 1 WHERE {version_filter}"), params)
+    conn.execute(text(f"DELETE FROM daily_user_totals WHERE {user_filter}"), params)
+    result = conn.execute(text(REBUILD_SQL.format(user_filter=user_filter)), params)
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintain the daily_user_totals rollup")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subcommands.add_parser("rebuild", help="Recompute rollups from the raw logs")
+    rebuild_parser.add_argument("--user", type=int, help="Only rebuild this user's rows")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        rows = rebuild(conn, user_id=args.user)
+    logger.info("Rebuilt %s daily_user_totals rows", rows)
@@ -0,0 +1,114 @@
+"""
+Prunes the food catalog to a bounded, varied candidate set before it is
+put in a plan-generation prompt, so prompt size stays flat as the catalog
+grows.
+
+Foods are dropped when their name matches one of the user's allergies or
+conflicts with their dietary preference, scored on how close their macro
+split is to the split that suits the user's goal, and then taken
+round-robin across protein-, carb- and fat-dominant groups so the planner
+still sees a balanced mix.
+"""
+import re
+from core.config import settings
+
+NON_VEG_TERMS = (
+    "chicken", "mutton", "lamb", "beef", "pork", "meat", "fish", "tuna", "salmon",
+    "prawn", "shrimp", "crab", "egg", "keema", "bacon", "ham", "sausage",
+)
+ANIMAL_PRODUCT_TERMS = (
+    "milk", "paneer", "cheese", "curd", "yogurt", "yoghurt", "ghee", "butter",
+    "cream", "whey", "honey", "lassi", "khoa",
+)
+# Plant-based foods whose names contain an animal-product term
+PLANT_BASED_NAMES = (
+    "peanut butter", "almond butter", "cashew butter", "cocoa butter",
+    "coconut milk", "almond milk", "soy milk", "oat milk", "coconut cream",
+)
+
+# Share of calories from (protein, carbs, fats) that each goal favours
+GOAL_MACRO_SPLITS = {
+    "weight loss": (0.35, 0.35, 0.30),
+    "weight gain": (0.25, 0.50, 0.25),
+    "maintain healthy": (0.20, 0.50, 0.30),
+}
+DEFAULT_MACRO_SPLIT = GOAL_MACRO_SPLITS["maintain healthy"]
+
+MACRO_GROUPS = ("protein", "carbs", "fats")
+
+
+def _allergy_terms(allergies) -> list[str]:
+    if not allergies:
+        return []
+    terms = re.split(r",|;|/|\band\b", str(allergies).lower())
+    terms = [term.strip() for term in terms]
+    return [term for term in terms if term and term != "none"]
+
+def _name_matches(name: str, terms) -> bool:
+    """Whole-word match, so "egg" blocks "Egg curry" but not "Eggplant"."""
+    name = name.lower()
+    for plant_based in PLANT_BASED_NAMES:
+        name = name.replace(plant_based, " ")
+    for term in terms:
+        # Singular and plural forms, so "eggs" also catches "Egg curry"
+        stem = term[:-1] if term.endswith("s") and len(term) > 3 else term
+        if re.search(rf"\b{re.escape(stem)}(?:e?s)?\b", name):
+            return True
+    return False
+
+def _excluded_terms(dietary_prefs) -> tuple:
+    prefs = dietary_prefs if isinstance(dietary_prefs, (list, tuple)) else [dietary_prefs]
+    prefs = {str(pref).lower() for pref in prefs if pref}
+    if "vegan" in prefs:
+        return NON_VEG_TERMS + ANIMAL_PRODUCT_TERMS
+    if "veg" in prefs:
+        return NON_VEG_TERMS
+    return ()
+
+def _macro_split(food: dict) -> tuple[float, float, float]:
+    energy = (
+        (food.get("protein") or 0) * 4,
+        (food.get("carbs") or 0) * 4,
+        (food.get("fats") or 0) * 9,
+    )
+    total = sum(energy)
+    if total <= 0:
+        return (0.0, 0.0, 0.0)
+    return tuple(value / total for value in energy)
+
+def _fit(split, target) -> float:
+    """1 for a perfect match with the goal's split, 0 for the worst possible."""
+    return 1 - sum(abs(actual - wanted) for actual, wanted in zip(split, target)) / 2
+
+
+def select_candidate_foods(food_list: list[dict], user_profile: dict, limit: int | None = None) -> list[dict]:
+    """At most `limit` (PLAN_CANDIDATE_FOODS) foods from `food_list` suited to `user_profile`."""
+    limit = settings.PLAN_CANDIDATE_FOODS if limit is None else limit
+
+    blocked = tuple(_allergy_terms(user_profile.get("allergies"))) + _excluded_terms(user_profile.get("dietary_prefs"))
+    allowed = [food for food in food_list if not _name_matches(food.get("name") or "", blocked)]
+    if len(allowed) <= limit:
+        return allowed
+
+    target = GOAL_MACRO_SPLITS.get(str(user_profile.get("goals") or "").lower(), DEFAULT_MACRO_SPLIT)
+
+    # Best-fitting foods first within each dominant-macro group
+    groups = {group: [] for group in MACRO_GROUPS}
+    for food in allowed:
+        split = _macro_split(food)
+        dominant = MACRO_GROUPS[split.index(max(split))]
+        groups[dominant].append((_fit(split, target), food))
+    queues = [
+        [food for _, food in sorted(members, key=lambda pair: pair[0], reverse=True)]
+        for members in groups.values()
+    ]
+
+    # Round-robin across groups so no single macro dominates the shortlist
+    candidates = []
+    while len(candidates) < limit:
+        for queue in queues:
+            if queue and len(candidates) < limit:
+                candidates.append(queue.pop(0))
+        if not any(queues):
+            break
+    return candidates
@@ -8,6 +8,7 @@ from core.config import settings
 from schemas.health_plan import CompleteHealthPlanSchema
 from utils import get_day_name
 from services.rag_service import get_rag_retriever
+from services.prompt_format import format_food_table, token_meter
 
 class GraphState(TypedDict):
     user_profile: dict
@@ -49,13 +50,13 @@ async def meal_planner_node(state: GraphState):
         ("system", "You are a Meal Planner AI. Generate a meal plan for {day_name} based on the profile, constraints, and RAG context.\n"
                    "Context: {context}\n"
                    "Profile: Diet={diet}, Goal={goal}, Allergies={allergies}, Budget={budget}\n"
-                   "Available Foods: {food_list}\n"
+                   "Available Foods (nutrients per the `per` reference amount):\n{food_list}\n"
                    "Feedback from Critic: {critic_feedback}\n\n"
                    "Output ONLY a JSON array of meals:\n"
                    "[{{\"meal\": \"Breakfast\", \"items\": [{{\"food_id\": 1, \"quantity\": 100, \"unit\": \"g\"}}]}}]"),
         ("human", "Generate the meal plan.")
     ])
-    chain = prompt | llm
+    chain = prompt | token_meter("meal_planner") | llm
     res = await chain.ainvoke({
         "day_name": state["day_name"],
         "context": state["context"],
@@ -63,7 +64,7 @@ async def meal_planner_node(state: GraphState):
         "goal": state["user_profile"]["goals"],
         "allergies": state["user_profile"].get("allergies", "None"),
         "budget": state["user_profile"].get("budget", "Standard"),
-        "food_list": json.dumps(state["food_items"], indent=2),
+        "food_list": format_food_table(state["food_items"]),
         "critic_feedback": state.get("critic_feedback", "None")
     })
     return {"meal_draft": res.content}
@@ -77,7 +78,7 @@ async def workout_planner_node(state: GraphState):
                    "{{\"focus_area\": \"Cardio\", \"exercises\": [{{\"name\": \"Running\", \"sets\": 1, \"reps\": \"30 mins\"}}]}}"),
         ("human", "Generate the workout plan.")
     ])
-    chain = prompt | llm
+    chain = prompt | token_meter("workout_planner") | llm
     res = await chain.ainvoke({
         "day_name": state["day_name"],
         "goal": state["user_profile"]["goals"],
@@ -90,20 +91,20 @@ async def critic_node(state: GraphState):
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are a Safety Critic. Review the drafted meal and workout plans against the user's allergies, budget, and goals.\n"
                    "Profile: Diet={diet}, Goal={goal}, Allergies={allergies}, Budget={budget}\n"
-                   "Available Foods (Cross-reference food_ids here): {food_list}\n\n"
+                   "Available Foods (Cross-reference food_ids here):\n{food_list}\n\n"
                    "Draft Meal Plan: {meal_draft}\n"
                    "Draft Workout Plan: {workout_draft}\n\n"
                    "If there are any violations (e.g. allergens included, budget ignored), output feedback starting with 'REJECTED: ' followed by the reasons.\n"
                    "If it is safe and adheres to all constraints, output 'APPROVED'. You must be strict."),
         ("human", "Review the drafts.")
     ])
-    chain = prompt | llm
+    chain = prompt | token_meter("critic") | llm
     res = await chain.ainvoke({
         "diet": state["user_profile"]["dietary_prefs"],
         "goal": state["user_profile"]["goals"],
         "allergies": state["user_profile"].get("allergies", "None"),
         "budget": state["user_profile"].get("budget", "Standard"),
-        "food_list": json.dumps(state["food_items"], indent=2),
+        "food_list": format_food_table(state["food_items"]),
         "meal_draft": state["meal_draft"],
         "workout_draft": state["workout_draft"]
     })
@@ -0,0 +1,359 @@
+"""
+Durable queue for AI plan generation, backed by the plan_jobs table.
+
+The API enqueues rows; one or more worker processes claim them with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so any number of workers can poll
+the same table without handing a job out twice:
+
+    python -m services.job_worker [--concurrency N]
+
+Each attempt's generation runs in its own child process, which is killed
+at JOB_TIMEOUT_SECONDS so a hung LLM call can't keep holding a worker slot.
+Failed or timed-out attempts are retried with exponential backoff up to
+the job's max_attempts. Jobs whose worker died mid-run are reclaimed once
+their lock goes stale, and finished jobs are purged after JOB_TTL_HOURS.
+Every write an attempt makes is conditioned on it still holding the job
+(status, locked_by and attempts unchanged), so a reclaimed attempt that
+finishes late can't overwrite the attempt that replaced it.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from sqlalchemy import select, delete, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from core.config import settings
+from db.models.job import PlanJob
+from db.partitions import ensure_future_partitions
+from db.session import SessionLocal
+from schemas.plan import GeneratedPlanSchema
+from services.food_candidates import select_candidate_foods
+from services.plan_generation import WEEK_DAYS, load_food_list, generate_day_plan, gather_days, save_meal_plan, plan_to_json
+from services.prompt_format import prompt_token_registry
+from utils import get_day_name
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 3600
+
+# Fresh interpreter per attempt: no inherited DB connections or lock state from the worker threads
+_mp = multiprocessing.get_context("spawn")
+
+
+class JobTimeout(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class JobLease:
+    """Identifies one claimed attempt of a job."""
+    job_id: str
+    worker_id: str
+    attempt: int
+
+
+# ---- Job kinds ----
+# Each kind is (generate, save): `generate(lease, payload, food_list, progress)`
+# is the slow LLM part and runs in a child process under the timeout (see
+# run_generation), so its arguments and output must pickle; `progress` is
+# whatever partial result an earlier attempt saved; `save(db, job, output)` runs in the transaction that completes the job.
+
+def _generate_meal_plan(lease: JobLease, payload: dict, food_list: list[dict], progress):
+    food_list = select_candidate_foods(food_list, payload["user_profile"])
+    return generate_day_plan(payload["user_profile"], food_list, payload["days"])
+
+def _save_meal_plan(db: Session, job: PlanJob, plan_data) -> dict:
+    plan_record = save_meal_plan(db, job.user_id, job.payload["days"], plan_data)
+    db.flush()
+    return {"plan_id": plan_record.id, "plan": plan_to_json(plan_data)}
+
+def _generate_week_meal_plan(lease: JobLease, payload: dict, food_list: list[dict], progress) -> dict:
+    """All seven days concurrently; each finished day is saved as progress so a retry only redoes the rest."""
+    finished = dict((progress or {}).get("days") or {})
+    lock = threading.Lock()
+
+    def on_day_done(day, plan_data):
+        with lock:
+            finished[str(day)] = plan_to_json(plan_data)
+            snapshot = {"days": dict(finished)}
+        if not save_job_progress(lease, snapshot):
+            logger.warning("Job %s attempt %s lost its lease, progress not saved", lease.job_id, lease.attempt)
+
+    food_list = select_candidate_foods(food_list, payload["user_profile"])
+    remaining = [day for day in WEEK_DAYS if str(day) not in finished]
+    asyncio.run(gather_days(
+        lambda day: asyncio.to_thread(generate_day_plan, payload["user_profile"], food_list, day),
+        remaining,
+        on_day_done
+    ))
+    return {int(day): GeneratedPlanSchema.model_validate(plan) for day, plan in finished.items()}
+
+def _save_week_meal_plan(db: Session, job: PlanJob, plans: dict) -> dict:
+    # Every day lands in the job's completing transaction, so the week is written all or nothing
+    records = {day: save_meal_plan(db, job.user_id, day, plans[day]) for day in sorted(plans)}
+    db.flush()
+    return {
+        "plans": [
+            {"day": get_day_name(day), "plan_id": record.id, "plan": plan_to_json(plans[day])}
+            for day, record in records.items()
+        ]
+    }
+
+JOB_KINDS = {
+    "meal_plan": (_generate_meal_plan, _save_meal_plan),
+    "meal_plan_week": (_generate_week_meal_plan, _save_week_meal_plan),
+}
+
+
+# ---- Attempt execution ----
+def _run_generation(conn, kind: str, lease: JobLease, payload: dict, food_list: list[dict], progress):
+    """Child process entry point: run the kind's generate step and send back (ok, output or error)."""
+    prompt_token_registry.reported_by = "worker"
+    try:
+        generate, _ = JOB_KINDS[kind]
+        conn.send((True, generate(lease, payload, food_list, progress)))
+    except Exception as e:
+        # Exceptions from LLM clients don't always pickle, the message is all the parent needs
+        conn.send((False, str(e) or type(e).__name__))
+    finally:
+        conn.close()
+
+def run_generation(kind: str, lease: JobLease, payload: dict, food_list: list[dict], progress, timeout: float):
+    """Run one attempt's generate step in a child process, terminating it if it outlives `timeout`."""
+    receiver, sender = _mp.Pipe(duplex=False)
+    process = _mp.Process(
+        target=_run_generation,
+        args=(sender, kind, lease, payload, food_list, progress),
+        name=f"plan-gen-{lease.job_id}",
+        daemon=True
+    )
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            raise JobTimeout()
+        try:
+            ok, value = receiver.recv()
+        except EOFError:
+            process.join(5)
+            raise RuntimeError(f"Generation process exited with code {process.exitcode}")
+    finally:
+        receiver.close()
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    if not ok:
+        raise RuntimeError(value)
+    return value
+
+
+# ---- Queue operations ----
+def enqueue_job(db: Session, user_id: int, kind: str, payload: dict) -> PlanJob:
+    job = PlanJob(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        kind=kind,
+        payload=payload,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+def claim_job(db: Session, worker_id: str) -> PlanJob | None:
+    job = db.scalar(
+        select(PlanJob)
+        .where(PlanJob.status == "pending", PlanJob.run_after <= func.now())
+        .order_by(PlanJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = "processing"
+    job.attempts += 1
+    job.locked_at = func.now()
+    job.locked_by = worker_id
+    db.commit()
+    db.refresh(job)
+    return job
+
+def _leased(lease: JobLease):
+    return (
+        PlanJob.id == lease.job_id,
+        PlanJob.status == "processing",
+        PlanJob.locked_by == lease.worker_id,
+        PlanJob.attempts == lease.attempt,
+    )
+
+def lock_leased_job(db: Session, lease: JobLease) -> PlanJob | None:
+    """The job row locked FOR UPDATE, or None if this attempt no longer holds it."""
+    return db.scalar(select(PlanJob).where(*_leased(lease)).with_for_update())
+
+def save_job_progress(lease: JobLease, progress: dict) -> bool:
+    """Persist a partial result from the generation process, in its own short transaction."""
+    db = SessionLocal()
+    try:
+        result = db.execute(update(PlanJob).where(*_leased(lease)).values(result=progress))
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+def retry_or_fail(job: PlanJob, error: str):
+    """Schedule another attempt with exponential backoff, or fail the job for good; the caller commits."""
+    job.error = error
+    job.locked_at = None
+    job.locked_by = None
+    if job.attempts < job.max_attempts:
+        delay = min(settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1), MAX_BACKOFF_SECONDS)
+        job.status = "pending"
+        job.run_after = func.now() + timedelta(seconds=delay)
+    else:
+        job.status = "failed"
+        job.finished_at = func.now()
+
+def reclaim_stale_jobs(db: Session) -> int:
+    """Put back jobs still locked long after any attempt could have timed out (their worker died)."""
+    stale = db.scalars(
+        select(PlanJob)
+        .where(
+            PlanJob.status == "processing",
+            PlanJob.locked_at < func.now() - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS)
+        )
+        .with_for_update(skip_locked=True)
+    ).all()
+    for job in stale:
+        logger.warning("Reclaiming job %s locked by %s", job.id, job.locked_by)
+        retry_or_fail(job, "Worker stopped responding")
+    db.commit()
+    return len(stale)
+
+def purge_expired_jobs(db: Session) -> int:
+    result = db.execute(
+        delete(PlanJob)
+        .where(
+            PlanJob.status.in_(("completed", "failed")),
+            PlanJob.finished_at < func.now() - timedelta(hours=settings.JOB_TTL_HOURS)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+# ---- Worker ----
+class JobWorker:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+
+    def run_next_job(self) -> bool:
+        """Claim and run one job; False when nothing was due."""
+        db = SessionLocal()
+        try:
+            job = claim_job(db, self.worker_id)
+            if job is None:
+                return False
+
+            logger.info("Running job %s (%s, attempt %s/%s)", job.id, job.kind, job.attempts, job.max_attempts)
+            lease = JobLease(job.id, self.worker_id, job.attempts)
+            try:
+                _, save = JOB_KINDS[job.kind]
+                kind, payload, progress = job.kind, job.payload, job.result
+                food_list = load_food_list(db)
+                # Release the connection while the LLM runs
+                db.rollback()
+
+                output = run_generation(kind, lease, payload, food_list, progress, settings.JOB_TIMEOUT_SECONDS)
+
+                job = lock_leased_job(db, lease)
+                if job is None:
+                    logger.warning("Job %s attempt %s lost its lease, discarding the result", lease.job_id, lease.attempt)
+                    db.rollback()
+                    return True
+                job.result = save(db, job, output)
+                job.status = "completed"
+                job.error = None
+                job.locked_at = None
+                job.finished_at = func.now()
+                db.commit()
+                logger.info("Job %s completed", lease.job_id)
+            except Exception as e:
+                db.rollback()
+                error = f"Timed out after {settings.JOB_TIMEOUT_SECONDS}s" if isinstance(e, JobTimeout) else str(e)
+                logger.warning("Job %s failed: %s", lease.job_id, error)
+                job = lock_leased_job(db, lease)
+                if job is not None:
+                    retry_or_fail(job, error)
+                db.commit()
+            return True
+        finally:
+            db.close()
+
+    def work(self):
+        while not self.stopping.is_set():
+            try:
+                if self.run_next_job():
+                    continue
+            except Exception:
+                logger.exception("Job loop error")
+            self.stopping.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    def maintain(self):
+        while not self.stopping.wait(settings.JOB_MAINTENANCE_INTERVAL_SECONDS):
+            db = SessionLocal()
+            try:
+                reclaimed = reclaim_stale_jobs(db)
+                purged = purge_expired_jobs(db)
+                if reclaimed or purged:
+                    logger.info("Maintenance: reclaimed %s stale jobs, purged %s expired jobs", reclaimed, purged)
+            except Exception:
+                logger.exception("Job maintenance error")
+            finally:
+                db.close()
+            try:
+                ensure_future_partitions()
+            except Exception:
+                logger.exception("Partition maintenance error")
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.work, name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self.maintain, name="job-maintenance"))
+        for thread in threads:
+            thread.start()
+        logger.info("Job worker %s started with %s slots", self.worker_id, self.concurrency)
+
+        for thread in threads:
+            thread.join()
+
+    def stop(self, *_):
+        logger.info("Job worker %s stopping", self.worker_id)
+        self.stopping.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run AI plan generation jobs")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    worker = JobWorker(args.concurrency)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.run()
@@ -9,6 +9,7 @@ from core.config import settings
 from schemas.plan import GeneratedPlanSchema
 from utils import get_day_name
 from services.rag_service import get_rag_retriever
+from services.prompt_format import format_food_table, token_meter
 
 def extract_json(text: str) -> dict:
     """
@@ -41,7 +42,7 @@ def generate_meal_plan(user_profile: dict, food_items: List[Dict], day: int = 1)
         "Dietary Preference: {dietary_prefs}\n"
         "Goal: {goals}\n"
         "BMI: {bmi}\n\n"
-        "Available Food Items (name, calories, protein, carbs, fats per reference unit):\n"
+        "Available Food Items (nutrients per the `per` reference amount):\n"
         "{food_list}\n\n"
         "Format the output STRICTLY as a JSON object for the given day ({day}):\n"
         "{{\n"
@@ -74,6 +75,7 @@ def generate_meal_plan(user_profile: dict, food_items: List[Dict], day: int = 1)
             "food_list": lambda x: x["food_list"],
         }
         | prompt
+        | token_meter("meal_plan")
         | llm
         | StrOutputParser()
     )
@@ -90,7 +92,7 @@ def generate_meal_plan(user_profile: dict, food_items: List[Dict], day: int = 1)
         "dietary_prefs": user_profile["dietary_prefs"],
         "goals": user_profile["goals"],
         "bmi": user_profile["bmi"],
-        "food_list": json.dumps(food_items, indent=2),
+        "food_list": format_food_table(food_items),
     })
 
     try:
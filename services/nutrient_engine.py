@@ -0,0 +1,155 @@
+"""
+Single place that turns (food, quantity, unit) into scaled nutrients.
+
+Units resolve in this order: the food's own reference unit, the food's
+`unit_conversions` (e.g. {"piece": 40} means one piece is 40 reference
+units), then the standard registry below for same-dimension units
+(e.g. kg -> g, tbsp -> ml).
+
+Rows that can't be scaled (an unconvertible unit, or a catalog entry without
+a positive reference amount) come back NaN and are listed in `invalid`.
+"""
+import logging
+import math
+from dataclasses import dataclass
+from typing import Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INVALID_UNIT = "Invalid unit for this food item"
+INVALID_REFERENCE_AMOUNT = "Food item has no valid reference amount"
+
+MACROS = ("calories", "protein", "carbs", "fats")
+
+# unit -> (dimension, size in the dimension's base unit: g for mass, ml for volume)
+UNIT_REGISTRY = {
+    "mg": ("mass", 0.001),
+    "g": ("mass", 1.0),
+    "kg": ("mass", 1000.0),
+    "oz": ("mass", 28.3495),
+    "lb": ("mass", 453.592),
+    "ml": ("volume", 1.0),
+    "l": ("volume", 1000.0),
+    "tsp": ("volume", 4.92892),
+    "tbsp": ("volume", 14.7868),
+    "cup": ("volume", 240.0),
+}
+
+UNIT_ALIASES = {
+    "gram": "g", "grams": "g", "gm": "g", "gms": "g",
+    "kilogram": "kg", "kilograms": "kg",
+    "milligram": "mg", "milligrams": "mg",
+    "ounce": "oz", "ounces": "oz",
+    "pound": "lb", "pounds": "lb", "lbs": "lb",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "teaspoon": "tsp", "teaspoons": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "cups": "cup",
+    "pieces": "piece", "pcs": "piece", "pc": "piece",
+}
+
+# Precomputed factors between every pair of same-dimension registry units
+STANDARD_CONVERSIONS = {
+    (source, target): source_size / target_size
+    for source, (source_dim, source_size) in UNIT_REGISTRY.items()
+    for target, (target_dim, target_size) in UNIT_REGISTRY.items()
+    if source_dim == target_dim
+}
+
+
+def normalize_unit(unit: str) -> str:
+    unit = (unit or "").strip().lower()
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def reference_units_per(food, unit: str) -> float | None:
+    """How many of the food's reference units one `unit` is, or None if it can't be converted."""
+    unit = normalize_unit(unit)
+    reference_unit = normalize_unit(food.reference_unit)
+    if unit == reference_unit:
+        return 1.0
+
+    for name, value in (food.unit_conversions or {}).items():
+        if normalize_unit(name) == unit:
+            return float(value)
+
+    return STANDARD_CONVERSIONS.get((unit, reference_unit))
+
+
+def _number(value) -> float | None:
+    """A finite float from a number or numeric string, else None."""
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+@dataclass
+class ScaledNutrients:
+    """Scaled nutrients for a batch; rows in `invalid` couldn't be scaled and are NaN."""
+    macros: np.ndarray       # (n, len(MACROS))
+    vitamin_keys: list
+    vitamins: np.ndarray     # (n, len(vitamin_keys)), NaN where a food has no usable value
+    invalid: dict            # row index -> reason (INVALID_UNIT / INVALID_REFERENCE_AMOUNT)
+
+    def row(self, index: int) -> dict:
+        values = {name: round(float(self.macros[index, i]), 2) for i, name in enumerate(MACROS)}
+        values["vitamins"] = {
+            key: float(self.vitamins[index, j])
+            for j, key in enumerate(self.vitamin_keys)
+            if not np.isnan(self.vitamins[index, j])
+        }
+        return values
+
+
+def scale_batch(foods: Sequence, quantities: Sequence, units: Sequence[str]) -> ScaledNutrients:
+    """Scale per-reference nutrients of `foods[i]` to `quantities[i]` `units[i]`, vectorized over the batch."""
+    n = len(foods)
+    per_unit = np.array(
+        [reference_units_per(food, unit) for food, unit in zip(foods, units)],
+        dtype=float
+    ) if n else np.zeros(0)
+    invalid = {int(i): INVALID_UNIT for i in np.flatnonzero(np.isnan(per_unit))}
+
+    quantities = np.array([float(q) for q in quantities], dtype=float)
+    reference_amounts = np.array(
+        [_number(food.reference_amount) for food in foods],
+        dtype=float
+    ) if n else np.zeros(0)
+    # Dividing by a missing or zero reference amount would yield NaN/inf, not a wrong-unit NaN
+    bad_reference = ~(reference_amounts > 0)
+    for i in np.flatnonzero(bad_reference):
+        invalid[int(i)] = INVALID_REFERENCE_AMOUNT
+    reference_amounts[bad_reference] = np.nan
+    scale = quantities * per_unit / reference_amounts
+
+    base_macros = np.array(
+        [[float(getattr(food, name) or 0) for name in MACROS] for food in foods],
+        dtype=float
+    ).reshape(n, len(MACROS))
+
+    vitamin_keys = sorted({key for food in foods for key in (food.vitamins or {})})
+    base_vitamins = np.full((n, len(vitamin_keys)), np.nan)
+    for i, food in enumerate(foods):
+        for j, key in enumerate(vitamin_keys):
+            value = (food.vitamins or {}).get(key)
+            if value is None:
+                continue
+            number = _number(value)
+            if number is None:
+                # Left NaN, i.e. reported as missing rather than guessed
+                logger.warning("Ignoring non-numeric vitamin %s=%r of food %s", key, value, getattr(food, "id", None))
+                continue
+            base_vitamins[i, j] = number
+
+    return ScaledNutrients(
+        macros=base_macros * scale[:, None],
+        vitamin_keys=vitamin_keys,
+        vitamins=base_vitamins * scale[:, None],
+        invalid=invalid,
+    )
@@ -0,0 +1,87 @@
+"""
+Meal-plan generation and persistence shared by the API and the job worker.
+"""
+import asyncio
+import json
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from core.config import settings
+from db.models.food import FoodItem
+from db.models.plan import Plan, PlanItem
+from schemas.plan import GeneratedPlanSchema
+from services.meal_plan_ai import generate_meal_plan
+from utils import get_day_name
+
+WEEK_DAYS = range(1, 8)
+
+
+def food_list_for_prompt(foods) -> list[dict]:
+    return [
+        {
+            "id": f.id,
+            "name": f.name,
+            "calories": float(f.calories),
+            "protein": float(f.protein),
+            "carbs": float(f.carbs),
+            "fats": float(f.fats),
+            "reference_amount": float(f.reference_amount),
+            "reference_unit": f.reference_unit
+        }
+        for f in foods
+    ]
+
+def load_food_list(db: Session) -> list[dict]:
+    return food_list_for_prompt(db.scalars(select(FoodItem)).all())
+
+def generate_day_plan(user_profile: dict, food_list: list[dict], day: int) -> GeneratedPlanSchema:
+    raw_plan = generate_meal_plan(user_profile, food_list, day)
+    if isinstance(raw_plan, GeneratedPlanSchema):
+        return raw_plan
+    return GeneratedPlanSchema.model_validate(raw_plan)
+
+def save_meal_plan(db: Session, user_id: int, day: int, plan_data: GeneratedPlanSchema) -> Plan:
+    """Create or replace the user's AI meal plan for `day`; the caller commits."""
+    name = f"{get_day_name(day)} AI Meal Plan"
+    plan_record = db.scalar(select(Plan).where(Plan.user_id == user_id, Plan.name == name))
+
+    if plan_record:
+        db.execute(delete(PlanItem).where(PlanItem.plan_id == plan_record.id))
+        plan_record.description = "Updated by AI"
+    else:
+        plan_record = Plan(user_id=user_id, name=name, description="Generated by AI")
+        db.add(plan_record)
+        db.flush()
+
+    db.add_all(
+        PlanItem(
+            plan_id=plan_record.id,
+            food_id=item.food_id,
+            quantity=item.quantity,
+            unit=item.unit,
+            meal_name=meal.meal,
+            day=plan_data.day
+        )
+        for meal in plan_data.meals
+        for item in meal.items
+    )
+    return plan_record
+
+def plan_to_json(plan) -> dict:
+    return json.loads(json.dumps(plan.model_dump(), default=float))
+
+async def gather_days(generate_day, days, on_day_done=None) -> list:
+    """
+    Await `generate_day(day)` for every day concurrently, at most
+    PLAN_GENERATION_CONCURRENCY at a time. `on_day_done(day, result)` is a
+    blocking callback run off the event loop as each day finishes.
+    """
+    semaphore = asyncio.Semaphore(settings.PLAN_GENERATION_CONCURRENCY)
+
+    async def run(day):
+        async with semaphore:
+            result = await generate_day(day)
+        if on_day_done is not None:
+            await asyncio.to_thread(on_day_done, day, result)
+        return result
+
+    return await asyncio.gather(*(run(day) for day in days))
@@ -0,0 +1,132 @@
+"""
+Compact prompt encoding for food lists, plus per-node prompt token metering.
+
+`format_food_table` renders foods as a header row followed by one
+pipe-separated row per food with rounded numbers, which costs a fraction
+of the tokens of indented JSON that repeats every key. `token_meter(node)`
+is a pass-through runnable placed between a prompt and its model: it
+counts the rendered prompt's tokens, records them per graph node for
+/v1/metrics/prompts, and refuses prompts over PROMPT_TOKEN_BUDGET.
+
+Counts are kept in the prompt_token_stats table so every process adds to
+the same totals. The health plan graph (meal_planner, workout_planner,
+critic) runs in the API processes; meal_plan runs in the job worker's
+generation processes, which set `prompt_token_registry.reported_by`.
+"""
+import logging
+from langchain_core.runnables import RunnableLambda
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+from core.config import settings
+from db.models.prompt_stats import PromptTokenStat
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+FOOD_TABLE_COLUMNS = ("id", "name", "kcal", "protein_g", "carbs_g", "fats_g", "per")
+
+
+class PromptTooLarge(ValueError):
+    pass
+
+
+def _number(value, digits: int = 1) -> str:
+    value = round(float(value or 0), digits)
+    return str(int(value)) if value == int(value) else str(value)
+
+def format_food_table(food_items: list[dict]) -> str:
+    """Header row plus `id|name|kcal|protein_g|carbs_g|fats_g|per` per food."""
+    rows = ["|".join(FOOD_TABLE_COLUMNS)]
+    for food in food_items:
+        rows.append("|".join((
+            str(food["id"]),
+            str(food.get("name") or "").replace("|", "/"),
+            _number(food.get("calories"), 0),
+            _number(food.get("protein")),
+            _number(food.get("carbs")),
+            _number(food.get("fats")),
+            f"{_number(food.get('reference_amount'))}{food.get('reference_unit') or ''}",
+        )))
+    return "\n".join(rows)
+
+
+# ---- Token metering ----
+_encoding = None
+
+def count_tokens(text: str) -> int:
+    """tiktoken's cl100k_base count, or a ~4 characters per token estimate if it is unavailable."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+class PromptTokenRegistry:
+    """Per-node aggregate of prompt sizes in prompt_token_stats, served by the metrics endpoint."""
+
+    def __init__(self, reported_by: str = "api"):
+        self.reported_by = reported_by
+
+    def record(self, node: str, tokens: int):
+        stmt = insert(PromptTokenStat).values(
+            node=node, reported_by=self.reported_by, prompts=1, tokens=tokens, max_tokens=tokens
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PromptTokenStat.node],
+            set_={
+                "reported_by": stmt.excluded.reported_by,
+                "prompts": PromptTokenStat.prompts + 1,
+                "tokens": PromptTokenStat.tokens + stmt.excluded.tokens,
+                "max_tokens": func.greatest(PromptTokenStat.max_tokens, stmt.excluded.max_tokens),
+                "updated_at": func.now(),
+            }
+        )
+        try:
+            with engine.begin() as conn:
+                conn.execute(stmt)
+        except Exception:
+            # Metering must never fail the generation it measures
+            logger.exception("Failed to record prompt tokens for %s", node)
+
+    def snapshot(self) -> dict:
+        with engine.connect() as conn:
+            rows = conn.execute(select(PromptTokenStat.__table__)).all()
+        return {
+            row.node: {
+                "reported_by": row.reported_by,
+                "prompts": row.prompts,
+                "tokens": row.tokens,
+                "max_tokens": row.max_tokens,
+                "avg_tokens": round(row.tokens / row.prompts, 1) if row.prompts else 0,
+            }
+            for row in rows
+        }
+
+    def reset(self):
+        with engine.begin() as conn:
+            conn.execute(delete(PromptTokenStat))
+
+
+prompt_token_registry = PromptTokenRegistry()
+
+
+def token_meter(node: str) -> RunnableLambda:
+    """Pass-through step for `prompt | token_meter(node) | llm` chains."""
+    def meter(prompt_value):
+        text = prompt_value if isinstance(prompt_value, str) else prompt_value.to_string()
+        tokens = count_tokens(text)
+        prompt_token_registry.record(node, tokens)
+        if settings.PROMPT_TOKEN_BUDGET and tokens > settings.PROMPT_TOKEN_BUDGET:
+            raise PromptTooLarge(
+                f"{node} prompt is {tokens} tokens, over the budget of {settings.PROMPT_TOKEN_BUDGET}"
+            )
+        return prompt_value
+
+    return RunnableLambda(meter, name=f"token_meter:{node}")
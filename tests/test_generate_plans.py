@@ -0,0 +1,31 @@
+import pytest
+from schemas.health_plan import CompleteHealthPlanSchema
+
+
+def _plan(day: int) -> CompleteHealthPlanSchema:
+    return CompleteHealthPlanSchema(
+        day=str(day),
+        meal_plan=[],
+        workout_plan={"focus_area": "Cardio", "exercises": []},
+        avoidance_list=[],
+        budget_tips=[],
+    )
+
+
+@pytest.mark.parametrize("params", [{"day": 1}, {"week": "true"}])
+def test_complete_plan_survives_the_mid_request_rollback(client, auth_headers, monkeypatch, params):
+    # The handler rolls back its session before running the LLM graph, then
+    # still needs the authenticated user
+    async def fake_plan(user_profile, food_items, day=1):
+        return _plan(day)
+
+    monkeypatch.setattr("api.generate_plans.generate_complete_health_plan", fake_plan)
+
+    response = client.post("/api/v1/generate-plan/complete", params=params, headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    if "week" in params:
+        assert len(body["plans"]) == 7
+    else:
+        assert body["plan_id"]
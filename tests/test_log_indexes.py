@@ -0,0 +1,141 @@
+import re
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import event, text
+
+# Enough users and history that a scan of one user's rows only wins with an index
+FILLER_USERS = 200
+HISTORY_DAYS = 120
+FOOD_LOGS_PER_DAY = 3
+
+# Per-user tables and the index (or its generated per-partition copies) reads must use
+PER_USER_INDEXES = {
+    "food_logs": "user_id_logged_at_id",
+    "workout_logs": "user_id_logged_at_id",
+    "daily_user_totals": "daily_user_totals_pkey",
+    "water_logs": "ix_water_logs_user_date",
+    "step_logs": "ix_step_logs_user_date",
+}
+
+ROUTES = [
+    "/api/v1/food-logs/",
+    "/api/v1/food-logs/?start_date={week_ago}",
+    "/api/v1/food-logs/summary?days=30",
+    "/api/v1/workout-logs/",
+    "/api/v1/workout-logs/summary?days=30",
+    "/api/v1/dashboard/summary",
+    "/api/v1/dashboard/trends?days=30",
+    "/api/v1/dashboard/today",
+    "/api/v1/tracking/water/today",
+    "/api/v1/tracking/steps/today",
+]
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """Months of food, workout and rollup history for the filler users, then ANALYZE."""
+    from db.partitions import PARTITIONED_TABLES, ensure_partitions, add_months, current_month
+
+    today = date.today()
+    start = today - timedelta(days=HISTORY_DAYS)
+    params = {"users": FILLER_USERS, "start": start, "days": HISTORY_DAYS, "per_day": FOOD_LOGS_PER_DAY}
+
+    with database.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            ensure_partitions(conn, table, start, add_months(current_month(), 1))
+
+        food_id = conn.execute(text(
+            "INSERT INTO food_items (name, calories, protein, carbs, fats, reference_amount, reference_unit) "
+            "VALUES ('Index test food', 100, 10, 10, 2, 100, 'g') RETURNING id"
+        )).scalar()
+        workout_id = conn.execute(text(
+            "INSERT INTO workouts (name, unit, calories_per_unit) VALUES ('Index test workout', 'minutes', 8) RETURNING id"
+        )).scalar()
+        user_ids = conn.execute(text(
+            "INSERT INTO users (name, email, password, is_onboarded) "
+            "SELECT 'Filler', 'filler-' || n || '-' || md5(random()::text) || '@example.com', 'x', true "
+            "FROM generate_series(1, :users) n RETURNING id"
+        ), params).scalars().all()
+        params.update(food_id=food_id, workout_id=workout_id, user_ids=user_ids)
+
+        conn.execute(text(
+            "INSERT INTO food_logs (user_id, food_id, quantity, unit, calories, protein, carbs, fats, logged_at) "
+            "SELECT u, :food_id, 100, 'g', 100, 10, 10, 2, :start + d * interval '1 day' + m * interval '5 hours' "
+            "FROM unnest(CAST(:user_ids AS integer[])) u, generate_series(0, :days - 1) d, generate_series(1, :per_day) m"
+        ), params)
+        conn.execute(text(
+            "INSERT INTO workout_logs (user_id, workout_id, duration_minutes, estimated_calories, logged_at) "
+            "SELECT u, :workout_id, 30, 240, :start + d * interval '1 day' + interval '7 hours' "
+            "FROM unnest(CAST(:user_ids AS integer[])) u, generate_series(0, :days - 1) d"
+        ), params)
+        conn.execute(text(
+            "INSERT INTO daily_user_totals (user_id, local_date, food_count, calories_consumed, workout_count, calories_burned) "
+            "SELECT u, :start + d, :per_day, 300, 1, 240 "
+            "FROM unnest(CAST(:user_ids AS integer[])) u, generate_series(0, :days - 1) d"
+        ), params)
+        for table in ("water_logs", "step_logs"):
+            column = "amount" if table == "water_logs" else "steps"
+            conn.execute(text(
+                f"INSERT INTO {table} (user_id, date, {column}) "
+                "SELECT u, :start + d, 1000 FROM unnest(CAST(:user_ids AS integer[])) u, generate_series(0, :days - 1) d"
+            ), params)
+
+    with database.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(
+            "ANALYZE users, food_logs, workout_logs, daily_user_totals, water_logs, step_logs"
+        ))
+
+    yield
+
+    with database.begin() as conn:
+        for table in ("daily_user_totals", "food_logs", "workout_logs", "water_logs", "step_logs", "users"):
+            column = "id" if table == "users" else "user_id"
+            conn.execute(text(f"DELETE FROM {table} WHERE {column} = ANY(:user_ids)"), params)
+        conn.execute(text("DELETE FROM food_items WHERE id = :food_id"), params)
+        conn.execute(text("DELETE FROM workouts WHERE id = :workout_id"), params)
+
+
+@pytest.fixture
+def captured_selects():
+    """SELECTs exactly as the routes send them through the async engine, with their parameters."""
+    from db.session import async_engine
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+def _explain(database, statement: str, parameters) -> str:
+    # asyncpg's numbered placeholders, re-bound for the sync (psycopg2) connection
+    sql = re.sub(r"\$(\d+)", r"%(p\1)s", statement.replace("%", "%%"))
+    params = {f"p{i}": value for i, value in enumerate(parameters or (), start=1)}
+    with database.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN {sql}", params)
+        return "\n".join(row[0] for row in rows)
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_route_queries_use_per_user_indexes(seeded, database, client, auth_headers, captured_selects, route):
+    path = route.format(week_ago=date.today() - timedelta(days=7))
+    response = client.get(path, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    checked = 0
+    for statement, parameters in captured_selects:
+        plan = _explain(database, statement, parameters)
+        for table, index in PER_USER_INDEXES.items():
+            # Partitions are named <table>_y2026m01 / <table>_default
+            if not re.search(rf"\b{table}(_\w+)?\b", plan):
+                continue
+            checked += 1
+            assert not re.search(rf"Seq Scan on {table}\b", plan), plan
+            # Lookups by primary key (e.g. refreshing a row just created) use their own index
+            if re.search(rf"\bWHERE\b.*\b{table}\.user_id\b", statement, re.S):
+                assert index in plan, plan
+    assert checked, f"{path} issued no per-user reads: {captured_selects}"
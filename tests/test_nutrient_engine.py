@@ -0,0 +1,31 @@
+import math
+from types import SimpleNamespace
+from services.nutrient_engine import scale_batch, INVALID_REFERENCE_AMOUNT, INVALID_UNIT
+
+
+def food(**overrides):
+    values = dict(id=1, calories=100, protein=10, carbs=20, fats=5, vitamins={},
+                  reference_amount=100, reference_unit="g", unit_conversions=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_non_positive_or_missing_reference_amount_is_invalid():
+    foods = [food(), food(reference_amount=0), food(reference_amount=None), food(reference_amount=-5)]
+    scaled = scale_batch(foods, [200] * 4, ["g", "g", "g", "oz"])
+
+    assert scaled.invalid == {1: INVALID_REFERENCE_AMOUNT, 2: INVALID_REFERENCE_AMOUNT, 3: INVALID_REFERENCE_AMOUNT}
+    assert scaled.row(0)["calories"] == 200
+    assert not any(math.isinf(value) for value in scaled.macros.flat)
+
+
+def test_unknown_unit_is_invalid():
+    scaled = scale_batch([food()], [1], ["piece"])
+    assert scaled.invalid == {0: INVALID_UNIT}
+
+
+def test_numeric_vitamin_strings_are_scaled_and_other_values_skipped(caplog):
+    scaled = scale_batch([food(vitamins={"c": "12.5", "a": 4, "b12": "trace", "d": True, "e": None})], [200], ["g"])
+
+    assert scaled.row(0)["vitamins"] == {"c": 25.0, "a": 8.0}
+    assert "b12" in caplog.text
@@ -0,0 +1,39 @@
+from auth.user_cache import user_cache
+from core.query_stats import route_query_registry
+
+
+def _queries(route: str) -> int:
+    return route_query_registry.snapshot()[route]["max_queries"]
+
+
+def test_user_lookup_is_the_only_query_for_me(client, auth_headers):
+    # The handler reuses the user the auth middleware loaded instead of querying again
+    user_cache.clear()
+    route_query_registry.reset()
+
+    response = client.get("/api/v1/user/me", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert _queries("GET /api/v1/user/me") == 1
+
+
+def test_cached_user_costs_no_queries(client, auth_headers):
+    client.get("/api/v1/user/me", headers=auth_headers)
+    route_query_registry.reset()
+
+    response = client.get("/api/v1/user/me", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert _queries("GET /api/v1/user/me") == 0
+
+
+def test_food_log_listing_stays_within_budget(client, auth_headers):
+    from api.food_logs import list_food_logs
+
+    user_cache.clear()
+    route_query_registry.reset()
+
+    response = client.get("/api/v1/food-logs/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert _queries("GET /api/v1/food-logs/") <= list_food_logs.query_budget
@@ -0,0 +1,29 @@
+import jwt
+from auth import jwt_handler
+from auth.jwt_handler import create_access_token, verify_access_token, token_cache
+
+
+def test_verified_token_is_served_from_cache():
+    token = create_access_token({"sub": "1"})
+    payload = verify_access_token(token)
+    assert verify_access_token(token) is payload
+
+
+def test_cache_hit_skips_signature_verification(monkeypatch):
+    token = create_access_token({"sub": "1"})
+    token_cache.clear()
+    decodes = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_handler.jwt, "decode", counting_decode)
+    hits = token_cache.stats()["hits"]
+
+    verify_access_token(token)
+    verify_access_token(token)
+
+    assert decodes == [token]
+    assert token_cache.stats()["hits"] == hits + 1
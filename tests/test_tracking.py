@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize("path,field", [
+    ("/api/v1/tracking/water/today", "amount"),
+    ("/api/v1/tracking/steps/today", "steps"),
+])
+def test_today_is_created_empty_and_served(client, auth_headers, path, field):
+    response = client.get(path, headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()[field] == 0
+    assert response.headers.get("etag")
+
+    # Same data version, so the client's copy is still current
+    cached = client.get(path, headers={**auth_headers, "If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
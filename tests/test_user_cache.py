@@ -0,0 +1,42 @@
+import asyncio
+
+
+def test_goal_update_invalidates_this_workers_copy(client, auth_headers, user):
+    from auth.user_cache import user_cache
+
+    assert client.get("/api/v1/user/me", headers=auth_headers).status_code == 200
+    assert user_cache.get(user.id) is not None
+
+    response = client.post("/api/v1/user/goals", headers=auth_headers, json={"goals": "weight loss", "target_weight": 70})
+    assert response.status_code == 200, response.text
+    assert user_cache.get(user.id) is None
+
+
+def test_invalidation_reaches_other_workers_on_commit_only(database):
+    from sqlalchemy.orm import Session
+    from auth.user_cache import USER_CACHE_CHANNEL
+    from core.pubsub import PostgresPubSub
+
+    dsn = database.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def run():
+        # Another worker, listening on its own connection
+        other = PostgresPubSub(dsn, engine=None)
+        received = asyncio.Queue()
+        other.add_handler(USER_CACHE_CHANNEL, received.put_nowait)
+        await other.start()
+        try:
+            publisher = PostgresPubSub(dsn, engine=None)
+            with Session(database) as db:
+                publisher.publish_on_commit(db, USER_CACHE_CHANNEL, {"type": "invalidate", "user_id": 1})
+                db.rollback()
+                publisher.publish_on_commit(db, USER_CACHE_CHANNEL, {"type": "invalidate", "user_id": 2})
+                db.commit()
+
+            message = await asyncio.wait_for(received.get(), timeout=5)
+            assert message == {"type": "invalidate", "user_id": 2}
+            assert received.empty()
+        finally:
+            await other.stop()
+
+    asyncio.run(run())